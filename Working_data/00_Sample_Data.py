@@ -1,6 +1,11 @@
 from pathlib import Path
 import pandas as pd
 import random
+import math
+import io
+import csv
+from build_cache import BuildCache, build_key
+from raw_files import find_csv_files, name_collisions, csv_name, compression_of, open_raw_text
 
 # Get project root (parent of Working_data folder where this script lives)
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -11,50 +16,243 @@ WORKING_DATA = PROJECT_ROOT / "Working_data\Sample_Data"
 
 # Sample size
 SAMPLE_SIZE = 10000
+RANDOM_SEED = 42
+
+# Sampling mode: "reservoir" reads every record once (exact uniform sample),
+# "seek" jumps to random byte offsets and reads only ~SAMPLE_SIZE records (fast, length-biased)
+SAMPLING_MODE = "reservoir"
+SEEK_WEIGHT_BY_LENGTH = False  # Resample seek candidates with 1/length weights to correct the bias
+SEEK_OVERSAMPLE = 4  # Candidates drawn per kept row when weighting by length
+SEEK_MIN_FILE_MB = 64  # Smaller files always use the reservoir
+SEEK_WINDOW_BYTES = 4096  # Initial read window around each offset (doubles as needed)
+SEEK_MAX_WINDOW_BYTES = 4 * 1024 * 1024
+
+# Raw files sampled before with the same settings are skipped (shared with 05_Apply_Cleaning)
+BUILD_CACHE_FILE = Path(__file__).parent / ".build_cache.json"
+
+def iter_records(f):
+    """Yield raw CSV records (with line endings), joining lines inside quoted fields"""
+    pending = []
+    inside_quotes = False
+    for line in f:
+        if '"' in line:
+            inside_quotes ^= line.count('"') % 2 == 1
+        if inside_quotes:
+            pending.append(line)
+            continue
+        if pending:
+            pending.append(line)
+            yield "".join(pending)
+            pending = []
+        else:
+            yield line
+    if pending:
+        yield "".join(pending)
+
+def reservoir_sample(records, k, rng):
+    """
+    Algorithm L reservoir sampling: pick k records uniformly in one pass with O(k) memory.
+    Returns: (sampled [(record_index, record), ...] in file order, total_records)
+    """
+    reservoir = []
+    total = 0
+    w = 1.0
+    next_index = 0
+    for i, record in enumerate(records):
+        total = i + 1
+        if i < k:
+            reservoir.append((i, record))
+            if i == k - 1:
+                # Reservoir full: schedule the first replacement
+                w = math.exp(math.log(1.0 - rng.random()) / k)
+                next_index = k + int(math.log(1.0 - rng.random()) / math.log(1.0 - w))
+        elif i == next_index:
+            reservoir[rng.randrange(k)] = (i, record)
+            w *= math.exp(math.log(1.0 - rng.random()) / k)
+            next_index += int(math.log(1.0 - rng.random()) / math.log(1.0 - w)) + 1
+    
+    reservoir.sort()
+    return reservoir, total
+
+# --- SEEK SAMPLING ---
+def _record_start(buf, pos, inside, at_data_start):
+    """
+    Walk back from pos to the start of the record containing it, given the quote state at pos.
+    Returns: start index, None if the window is too small, -1 if the state is impossible
+    """
+    while True:
+        nl = buf.rfind(b'\n', 0, pos)
+        if nl == -1:
+            if not at_data_start:
+                return None
+            inside ^= buf.count(b'"', 0, pos) % 2 == 1
+            return -1 if inside else 0
+        inside ^= buf.count(b'"', nl + 1, pos) % 2 == 1
+        if not inside:
+            return nl + 1
+        pos = nl
+
+def _record_end(buf, pos, inside, at_eof):
+    """
+    Walk forward from pos to the end of the record containing it, given the quote state at pos.
+    Returns: end index (past the newline), None if the window is too small, -1 if impossible
+    """
+    while True:
+        nl = buf.find(b'\n', pos)
+        if nl == -1:
+            if not at_eof:
+                return None
+            inside ^= buf.count(b'"', pos) % 2 == 1
+            return -1 if inside else len(buf)
+        inside ^= buf.count(b'"', pos, nl) % 2 == 1
+        if not inside:
+            return nl + 1
+        pos = nl + 1
+
+def _is_valid_record(record, n_cols):
+    rows = list(csv.reader(io.StringIO(record.decode('utf-8', errors='replace'), newline='')))
+    return len(rows) == 1 and len(rows[0]) == n_cols
+
+def locate_record(f, offset, data_start, file_size, n_cols):
+    """
+    Resync from a random byte offset to the record that contains it.
+    The quote state at the offset is unknown, so both hypotheses (outside/inside a
+    quoted field) are tried; a hypothesis survives only if its record parses to
+    exactly n_cols fields. Returns: (start_offset, record_bytes) or None
+    """
+    window = SEEK_WINDOW_BYTES
+    while True:
+        lo = max(data_start, offset - window)
+        hi = min(file_size, offset + window)
+        f.seek(lo)
+        buf = f.read(hi - lo)
+        rel = offset - lo
+        
+        needs_wider = False
+        for inside in (False, True):  # Unquoted position is by far the common case
+            start = _record_start(buf, rel, inside, lo == data_start)
+            end = _record_end(buf, rel, inside, hi == file_size)
+            if start is None or end is None:
+                needs_wider = True
+                continue
+            if start == -1 or end == -1:
+                continue
+            record = buf[start:end]
+            if _is_valid_record(record, n_cols):
+                return lo + start, record
+        
+        if not needs_wider or window >= SEEK_MAX_WINDOW_BYTES:
+            return None
+        window *= 2
+
+def seek_sample(csv_file, k, rng, weight_by_length):
+    """
+    Sample records by seeking to random byte offsets.
+    A record is hit with probability proportional to its byte length; with
+    weight_by_length, SEEK_OVERSAMPLE * k candidates are drawn and k of them are
+    kept by weighted sampling without replacement (weights 1/length).
+    Returns: (header, [record_bytes, ...] in file order, estimated_total_rows)
+    """
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        header = next(iter_records(f))
+    data_start = len(header.encode('utf-8'))
+    n_cols = len(next(csv.reader([header])))
+    file_size = csv_file.stat().st_size
+    
+    target = k * SEEK_OVERSAMPLE if weight_by_length else k
+    candidates = {}
+    attempts = 0
+    with open(csv_file, 'rb') as f:
+        while len(candidates) < target and attempts < target * 4 and file_size > data_start:
+            attempts += 1
+            found = locate_record(f, rng.randrange(data_start, file_size), data_start, file_size, n_cols)
+            if found:
+                candidates[found[0]] = found[1]
+    
+    # Length-biased sample -> harmonic mean gives an unbiased mean record length
+    inv_lengths = [1.0 / len(rec) for rec in candidates.values()]
+    est_rows = int((file_size - data_start) * sum(inv_lengths) / len(inv_lengths)) if inv_lengths else 0
+    
+    if weight_by_length and len(candidates) > k:
+        # Efraimidis-Spirakis: key = u ** (1 / weight) with weight = 1 / length
+        keyed = sorted(candidates, key=lambda start: rng.random() ** len(candidates[start]), reverse=True)
+        keep = set(keyed[:k])
+        candidates = {start: rec for start, rec in candidates.items() if start in keep}
+    
+    records = [candidates[start].decode('utf-8', errors='replace') for start in sorted(candidates)]
+    return header, records, est_rows
 
 def sample_csv_files():
     """Sample 10000 rows from each CSV in Raw_Data and save to Working_data"""
     
-    # Get all CSV files in Raw_Data
-    csv_files = list(RAW_DATA.glob("*.csv"))
+    # Get all CSV files in Raw_Data (.csv plus .csv.gz / .csv.bz2 / .csv.zst, streamed without unpacking)
+    csv_files = find_csv_files(RAW_DATA)
     
     if not csv_files:
         print("❌ No CSV files found in Raw_Data folder")
         return
     
+    # data.csv and data.csv.gz would both write sample_data.csv
+    collisions = name_collisions(csv_files)
+    if collisions:
+        for name, paths in collisions.items():
+            print(f"❌ {', '.join(path.name for path in paths)} would all be sampled as {name} (same sample file)")
+        print("   Keep one copy of each file in Raw_Data")
+        return
+    
     print(f"📊 Found {len(csv_files)} CSV file(s) in Raw_Data\n")
     
+    build_cache = BuildCache(BUILD_CACHE_FILE, 'sample')
+    
     for csv_file in csv_files:
         try:
             print(f"📖 Processing: {csv_file.name}")
             
-            # Fast row count using wc-like approach
-            print(f"   🔢 Counting rows...")
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                total_rows = sum(1 for _ in f) - 1  # -1 for header
-            
-            print(f"   📏 Total rows: {total_rows:,}")
+            # Skip files that haven't changed since they were last sampled with these settings
+            key = build_key(csv_file, SAMPLE_SIZE, RANDOM_SEED, SAMPLING_MODE, SEEK_WEIGHT_BY_LENGTH,
+                            SEEK_OVERSAMPLE, SEEK_MIN_FILE_MB)
+            cached = build_cache.lookup(csv_file.name, key)
+            if cached and (WORKING_DATA / cached['output_file']).exists():
+                print(f"   ♻️  Unchanged since last run, keeping {cached['output_file']} ({cached['rows']:,} rows)\n")
+                continue
             
-            # Determine sample size
-            sample_n = min(SAMPLE_SIZE, total_rows)
+            # Compressed streams can't jump to byte offsets
+            compressed = compression_of(csv_file) is not None
+            use_seek = SAMPLING_MODE == "seek" and not compressed and csv_file.stat().st_size >= SEEK_MIN_FILE_MB * 1024 * 1024
             
-            if total_rows <= SAMPLE_SIZE:
-                # Small file - just read it all
-                print(f"   📥 Reading all rows...")
-                df = pd.read_csv(csv_file)
+            if use_seek:
+                # Random byte offsets: reads ~SAMPLE_SIZE records, not the whole file
+                print(f"   🎯 Seek sampling {SAMPLE_SIZE:,} rows...")
+                header, records, est_rows = seek_sample(csv_file, SAMPLE_SIZE, random.Random(RANDOM_SEED), SEEK_WEIGHT_BY_LENGTH)
+                print(f"   📏 Estimated rows: ~{est_rows:,}")
+                print(f"   ⚠️  Seek sampling is length-biased: longer records are more likely to be picked")
+                if SEEK_WEIGHT_BY_LENGTH:
+                    print(f"   ⚖️  Corrected by 1/length resampling over {SEEK_OVERSAMPLE}x candidates")
+                else:
+                    print(f"   ⚖️  Set SEEK_WEIGHT_BY_LENGTH = True to correct for it")
             else:
-                # Large file - use skiprows for MUCH faster sampling
-                print(f"   ⚡ Fast sampling {sample_n:,} rows...")
-                
-                # Generate random row indices to keep
-                random.seed(42)
-                skip_indices = sorted(random.sample(range(1, total_rows + 1), total_rows - sample_n))
+                # Single pass: reservoir-sample records while counting them
+                if SAMPLING_MODE == "seek" and compressed:
+                    print(f"   ℹ️  Compressed file, using reservoir sampling")
+                elif SAMPLING_MODE == "seek":
+                    print(f"   ℹ️  File under {SEEK_MIN_FILE_MB} MB, using reservoir sampling")
+                print(f"   ⚡ Reservoir sampling {SAMPLE_SIZE:,} rows (single pass)...")
+                with open_raw_text(csv_file, encoding='utf-8', newline='') as f:
+                    records = iter_records(f)
+                    header = next(records)
+                    sampled, total_rows = reservoir_sample(records, SAMPLE_SIZE, random.Random(RANDOM_SEED))
+                records = [record for _, record in sampled]
                 
-                # Read CSV but skip the randomly selected rows
-                df = pd.read_csv(csv_file, skiprows=skip_indices)
+                print(f"   📏 Total rows: {total_rows:,}")
+            
+            # Parse only the sampled records (kept in file order)
+            if not header.endswith('\n'):
+                header += '\n'
+            text = header + "".join(record if record.endswith('\n') else record + '\n' for record in records)
+            df = pd.read_csv(io.StringIO(text))
             
             # Create output filename with "sample_" prefix
-            output_file = WORKING_DATA / f"sample_{csv_file.name}"
+            output_file = WORKING_DATA / f"sample_{csv_name(csv_file)}"
             
             # Save to Working_data
             print(f"   💾 Saving to {output_file.name}...")
@@ -62,6 +260,9 @@ def sample_csv_files():
             
             print(f"   ✅ Complete! Sampled {len(df):,} rows\n")
             
+            build_cache.record(csv_file.name, key, {'output_file': output_file.name, 'rows': len(df)})
+            build_cache.save()
+            
         except Exception as e:
             print(f"   ❌ Error processing {csv_file.name}: {e}\n")
 
@@ -69,7 +270,8 @@ if __name__ == "__main__":
     print("🎲 CSV Sampling Script (Fast Version)\n")
     print(f"📂 Raw Data Folder: {RAW_DATA}")
     print(f"📂 Working Data Folder: {WORKING_DATA}")
-    print(f"🔢 Sample Size: {SAMPLE_SIZE:,} rows\n")
+    print(f"🔢 Sample Size: {SAMPLE_SIZE:,} rows")
+    print(f"🎲 Sampling Mode: {SAMPLING_MODE}\n")
     
     sample_csv_files()
     
@@ -3,6 +3,14 @@ import pandas as pd
 from pathlib import Path
 import json
 import re
+import os
+import math
+import time
+import contextlib
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from date_sniffer import sniff_date_format, parse_dates
 
 "streamlit run Working_data/01_Data_Categorizer.py"
 
@@ -13,6 +21,17 @@ SAMPLE_DATA = WORKING_DATA / "Sample_Data"  # ← Add this
 CONFIG_FILE = WORKING_DATA / "02_Data_Categories.json"
 DESCRIPTIONS_FILE = WORKING_DATA / "00_column_descriptions.json"
 CATEGORIES = ["int", "float", "date", "string", "IGNORE"]
+PROFILE_SUFFIX = ".profile.json"  # Column analysis cache saved next to each sample
+NUM_SAMPLES = 50
+PAGE_SIZE = 25  # Columns rendered per page
+FILTERS = ["All", "Unsaved", "Low confidence"]
+FLUSH_DELAY_SECONDS = 2.0  # Category edits are written once this long has passed since the last one
+LOCK_TIMEOUT_SECONDS = 10.0  # Give up waiting for another session's write after this long
+LOCK_STALE_SECONDS = 30.0  # A lock file older than this was left behind by a crashed session
+
+# Cell tagging patterns (RE2 syntax, run by pyarrow once per distinct cell shape)
+NUMERIC_PATTERN = r'^[+-]?((\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|[iI][nN][fF]([iI][nN][iI][tT][yY])?)$'
+DATE_LIKE_PATTERN = r'\d[-/.:T ]\d|(?i:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)'
 
 # --- STORAGE FUNCTIONS ---
 def load_categories():
@@ -33,105 +52,105 @@ def load_descriptions():
             return {}
     return {}
 
-def save_single_category(file_name, col_name, new_category):
-    """Updates a single category in the JSON file immediately"""
-    current_data = load_categories()
-    if file_name not in current_data:
-        current_data[file_name] = {}
-    
-    current_data[file_name][col_name] = new_category
-    
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(current_data, f, indent=2)
+@st.cache_data(show_spinner=False)
+def load_categories_cached(mtime_ns, size):
+    return load_categories()
 
-# --- ANALYTICS ENGINE ---
-def get_dominance_stats(series):
-    """Calculates how dominant the most frequent value is."""
-    clean = series.dropna().astype(str)
-    clean = clean[clean.str.strip().str.len() > 0]
-    
-    if len(clean) == 0:
-        return 0.0
-        
-    counts = clean.value_counts(normalize=True)
-    top_pct = counts.iloc[0]
-    return top_pct
+def read_saved_categories():
+    """Saved categories, re-read only when the file changes"""
+    if not CONFIG_FILE.exists():
+        return {}
+    stat = CONFIG_FILE.stat()
+    return load_categories_cached(stat.st_mtime_ns, stat.st_size)
 
-def analyze_column(series):
-    """
-    Analyzes column to return strict type matches.
-    """
-    # 1. Base Clean (Filter out empty/whitespace)
-    clean_series = series.dropna().astype(str)
-    clean_series = clean_series[clean_series.str.strip().str.len() > 0]
-    
-    total_rows = len(series)
-    filled_rows = len(clean_series)
-    
-    # Initialize Stats
-    stats = {k: 0.0 for k in CATEGORIES}
-    
-    # 2. Check IGNORE (Empty / Dominance)
-    is_ignore = False
-    ignore_reason = ""
-    
-    if filled_rows == 0:
-        is_ignore = True
-        ignore_reason = "Empty"
-    else:
-        fill_rate = filled_rows / total_rows
-        if fill_rate < 0.05: # >95% Empty
-            is_ignore = True
-            ignore_reason = f">95% Empty ({ (1-fill_rate)*100:.1f}%)"
-        else:
-            # Dominance Check
-            counts = clean_series.value_counts(normalize=True)
-            top_freq = counts.iloc[0]
-            if top_freq >= 0.95:
-                is_ignore = True
-                ignore_reason = f"Dominance {top_freq:.0%}"
+@contextlib.contextmanager
+def config_lock():
+    """Lock file next to the config so concurrent sessions take turns writing it"""
+    lock_path = CONFIG_FILE.with_suffix('.lock')
+    deadline = time.time() + LOCK_TIMEOUT_SECONDS
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock_path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"{CONFIG_FILE.name} is locked by another session")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        lock_path.unlink(missing_ok=True)
 
-    # 3. Numeric Analysis (Strict separation)
-    cleaned_str = clean_series.str.replace(r'[$,_\s)]', '', regex=True).str.replace('(', '-', regex=False)
-    numeric_series = pd.to_numeric(cleaned_str, errors='coerce')
+# Write-behind store: edits are staged in the session and written in batches
+def pending_categories():
+    """Edits not yet on disk: {file: {col: category}}"""
+    return st.session_state.setdefault('pending_categories', {})
+
+def stage_category(file_name, col_name, new_category):
+    pending_categories().setdefault(file_name, {})[col_name] = new_category
+    st.session_state['last_edit'] = time.time()
+
+def flush_categories():
+    """Merge staged edits into the latest file on disk and replace it atomically"""
+    pending = pending_categories()
+    if not pending:
+        return 0
     
-    if filled_rows > 0:
-        valid_numerics = numeric_series.notna()
-        numeric_count = valid_numerics.sum()
-        
-        # Calculate Non-Numeric % (This is the "string" score)
-        stats['string'] = (filled_rows - numeric_count) / filled_rows
+    with config_lock():
+        # Re-read under the lock so edits from other sessions aren't lost
+        current_data = load_categories()
+        for file_name, cols in pending.items():
+            current_data.setdefault(file_name, {}).update(cols)
         
-        # Strict Int: Numeric AND No remainder
-        ints = numeric_series[valid_numerics]
-        strict_ints = (ints % 1 == 0).sum()
-        stats['int'] = strict_ints / filled_rows
-        
-        # Strict Float: Numeric AND Remainder
-        strict_floats = (ints % 1 != 0).sum()
-        stats['float'] = strict_floats / filled_rows
+        tmp_path = CONFIG_FILE.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(current_data, f, indent=2)
+        os.replace(tmp_path, CONFIG_FILE)
+    
+    count = sum(len(cols) for cols in pending.values())
+    pending.clear()
+    return count
 
-    # 4. Strict Date Analysis
-    if filled_rows > 0:
-        try:
-            # Try parsing everything
-            dates = pd.to_datetime(clean_series, errors='coerce')
-            is_valid_date = dates.notna()
-            
-            # Identify pure numbers (like "2023" or "1")
-            is_pure_number = clean_series.str.match(r'^\d+$')
-            
-            # Logic: If it's a pure number, it must be 8 digits (YYYYMMDD) to count as a date.
-            # This prevents "2023" (4 digits) from being called a date.
-            mask_exclude = is_pure_number & (clean_series.str.len() != 8)
-            
-            final_date_mask = is_valid_date & (~mask_exclude)
-            
-            stats['date'] = final_date_mask.sum() / filled_rows
-        except:
-            stats['date'] = 0.0
-            
-    # 5. Recommendation Logic (Threshold: 95%)
+def flush_if_due():
+    """Debounce: write only once edits have settled for FLUSH_DELAY_SECONDS"""
+    if pending_categories() and time.time() - st.session_state.get('last_edit', 0) >= FLUSH_DELAY_SECONDS:
+        flush_categories()
+
+def on_category_change(file_name, col_name):
+    new_cat = st.session_state[f"rad_{col_name}"]
+    stage_category(file_name, col_name, new_cat)
+    st.toast(f"Updated {col_name} -> {new_cat}")
+
+@st.fragment(run_every=FLUSH_DELAY_SECONDS)
+def save_status():
+    """Flushes staged edits on a timer, with a button to save right away"""
+    flush_if_due()
+    pending_count = sum(len(cols) for cols in pending_categories().values())
+    if st.button(f"💾 Save ({pending_count})", disabled=pending_count == 0, key="save_categories"):
+        flush_categories()
+        pending_count = 0
+    st.caption(f"{pending_count} unsaved changes" if pending_count else "All changes saved")
+
+# --- ANALYTICS ENGINE ---
+def _to_arrow_strings(series):
+    """One column as an Arrow string array (nulls for missing)"""
+    try:
+        arr = pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = pa.array(series.astype(str).where(series.notna()), from_pandas=True)
+    if not pa.types.is_string(arr.type):
+        arr = pc.cast(arr, pa.string())
+    return arr
+
+def recommend(stats, is_ignore, ignore_reason):
+    """Recommendation Logic (Threshold: 95%)"""
     confident = True
     
     if is_ignore:
@@ -158,6 +177,260 @@ def analyze_column(series):
         "stats": stats
     }
 
+def _strip_number(arr):
+    """Drop currency signs, thousands separators and spaces; accounting negatives (123) -> -123"""
+    return pc.replace_substring(pc.replace_substring_regex(arr, r'[$,_\s)]', ''), '(', '-')
+
+def _cell_shapes(arr):
+    """
+    Each cell with its digits collapsed: a run of zeros becomes '0', a run of other digits '1'
+    ('$1,234.50' -> '$1,1.10'). The tagging patterns only look at digit runs (and wholeness
+    at nonzero digits after the '.'), so cells sharing a shape share their tags.
+    Returns: shapes as an Arrow string array
+    """
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int32)[arr.offset:arr.offset + len(arr) + 1]
+    data = arr.buffers()[2]
+    data = np.frombuffer(data, dtype=np.uint8)[offsets[0]:offsets[-1]] if data else np.zeros(0, dtype=np.uint8)
+    offsets = offsets - offsets[0]
+    
+    digit = data - np.uint8(ord('0'))  # Wraps around for anything below '0'
+    is_digit = digit < 10
+    shape = np.where(is_digit, np.where(digit > 0, np.uint8(ord('1')), np.uint8(ord('0'))), data)
+    repeats = np.zeros(len(data), dtype=bool)
+    repeats[1:] = is_digit[1:] & (shape[1:] == shape[:-1])
+    repeats[offsets[:-1][offsets[:-1] < len(data)]] = False  # Runs don't carry over into the next cell
+    shape_offsets = (offsets - np.searchsorted(np.flatnonzero(repeats), offsets)).astype(np.int32)
+    return pa.Array.from_buffers(pa.string(), len(arr), [None, pa.py_buffer(shape_offsets), pa.py_buffer(shape[~repeats])])
+
+def _tag_strings(series):
+    """
+    Tag a text column: distinct values are tagged once and weighted by how often they occur,
+    and the regexes run once per distinct shape (see _cell_shapes), not once per cell.
+    Returns: {'filled', 'int', 'float', 'top', 'date_cells', 'date_values', 'date_counts'}
+    """
+    encoded = pc.dictionary_encode(_to_arrow_strings(series), null_encoding='encode')
+    indices = encoded.indices.to_numpy(zero_copy_only=False)
+    values = encoded.dictionary
+    counts = np.bincount(indices, minlength=len(values))
+    shape_codes = pc.dictionary_encode(_cell_shapes(values))
+    distinct = shape_codes.dictionary
+    value_shape = shape_codes.indices.to_numpy(zero_copy_only=False)
+    
+    def tag(kernel_result):
+        return kernel_result.to_numpy(zero_copy_only=False)[value_shape]
+    
+    # 1. Base Clean (Filter out empty/whitespace)
+    is_filled = tag(pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(distinct)), 0))
+    
+    # 2. Numeric Analysis (Strict separation)
+    is_digits = tag(pc.utf8_is_digit(distinct))
+    stripped = _strip_number(distinct)
+    is_numeric = tag(pc.match_substring_regex(stripped, NUMERIC_PATTERN)) & ~is_digits
+    # Whole unless a nonzero digit ('1' in the shape) follows the '.'; inf and exponents are parsed to tell
+    is_whole = ~tag(pc.match_substring_regex(stripped, r'\.\d*1'))
+    parsed = is_numeric & tag(pc.match_substring_regex(distinct, r'[A-Za-z]'))
+    if parsed.any():
+        numbers = pc.cast(_strip_number(values.filter(parsed)), pa.float64()).to_numpy()
+        with np.errstate(invalid='ignore'):  # inf % 1 is NaN, i.e. not whole
+            is_whole[parsed] = np.mod(numbers, 1) == 0
+    
+    # 3. Date candidates: date-like text, or pure numbers with 8 digits (YYYYMMDD), so "2023" isn't a date
+    is_date_like = tag(pc.match_substring_regex(distinct, DATE_LIKE_PATTERN)) & ~is_numeric & ~is_digits
+    is_eight_digits = is_digits & (pc.utf8_length(values).to_numpy(zero_copy_only=False) == 8)
+    candidates = is_date_like | is_eight_digits
+    
+    tags = {
+        'filled': int(counts[is_filled].sum()),
+        'int': int(counts[is_digits | (is_numeric & is_whole)].sum()),
+        'float': int(counts[is_numeric & ~is_whole].sum()),
+        'top': int(counts[is_filled].max()) if is_filled.any() else 0,
+        'date_cells': None
+    }
+    if candidates.any():
+        tags['date_values'] = values.filter(candidates).to_pandas()
+        tags['date_counts'] = counts[candidates]
+        rank = np.cumsum(candidates) - 1
+        tags['date_cells'] = tags['date_values'].take(rank[indices[candidates[indices]]])  # In row order, for sniffing
+    return tags
+
+def _tag_numbers(series):
+    """Tag a column already read as numbers (no strings needed). Returns: same as _tag_strings"""
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    distinct, counts = np.unique(values, return_counts=True)
+    with np.errstate(invalid='ignore'):  # inf - inf is NaN, i.e. not whole
+        is_whole = distinct - np.floor(distinct) == 0
+    # Whole numbers from 10000000 to 99999999 are written with 8 digits (YYYYMMDD candidates)
+    candidates = is_whole & (distinct >= 1e7) & (distinct < 1e8)
+    
+    tags = {
+        'filled': len(values),
+        'int': int(counts[is_whole].sum()),
+        'float': int(counts[~is_whole].sum()),
+        'top': int(counts.max()) if len(counts) else 0,
+        'date_cells': None
+    }
+    if candidates.any():
+        tags['date_values'] = pc.cast(pa.array(distinct[candidates].astype(np.int64)), pa.string()).to_pandas()
+        tags['date_counts'] = counts[candidates]
+        in_row_order = values[(np.floor(values) == values) & (values >= 1e7) & (values < 1e8)]
+        tags['date_cells'] = pc.cast(pa.array(in_row_order.astype(np.int64)), pa.string()).to_pandas()  # For sniffing
+    return tags
+
+def analyze_frame(df):
+    """
+    Analyzes every column of a frame to return strict type matches, one pass per column.
+    Numeric columns are tagged from their values; text columns get one Arrow conversion
+    and are tagged per distinct value and shape (see _tag_strings).
+    Only date candidates are parsed (each distinct value once), with the format sniffed from them.
+    Returns: {col: {'recommended', 'reason', 'confident', 'stats', 'date_format', 'dominance'}}
+    """
+    total_rows = len(df)
+    results = {}
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if pd.api.types.is_integer_dtype(series) or pd.api.types.is_float_dtype(series):
+            tags = _tag_numbers(series)
+        else:
+            tags = _tag_strings(series)
+        
+        # Strict Date Analysis
+        date_format, date_count = None, 0
+        if tags['date_cells'] is not None:
+            try:
+                date_format = sniff_date_format(tags['date_cells'])
+                # No dominant format: not a date column (skips per-value parsing of mixed text)
+                if date_format:
+                    parsed = parse_dates(tags['date_values'], date_format).notna().to_numpy()
+                    date_count = int(tags['date_counts'][parsed].sum())
+            except Exception:
+                date_count = 0
+        
+        filled_rows = tags['filled']
+        stats = {k: 0.0 for k in CATEGORIES}
+        
+        # Check IGNORE (Empty / Dominance)
+        is_ignore = False
+        ignore_reason = ""
+        dominance = tags['top'] / filled_rows if filled_rows > 0 else 0.0
+        
+        if filled_rows == 0:
+            is_ignore = True
+            ignore_reason = "Empty"
+        else:
+            fill_rate = filled_rows / total_rows
+            if fill_rate < 0.05: # >95% Empty
+                is_ignore = True
+                ignore_reason = f">95% Empty ({ (1-fill_rate)*100:.1f}%)"
+            elif dominance >= 0.95:
+                is_ignore = True
+                ignore_reason = f"Dominance {dominance:.0%}"
+            
+            stats['string'] = float((filled_rows - tags['int'] - tags['float']) / filled_rows)
+            stats['int'] = float(tags['int'] / filled_rows)
+            stats['float'] = float(tags['float'] / filled_rows)
+            stats['date'] = float(date_count / filled_rows)
+        
+        results[col] = {**recommend(stats, is_ignore, ignore_reason), 'date_format': date_format, 'dominance': float(dominance)}
+    
+    return results
+
+def analyze_column(series):
+    """
+    Analyzes column to return strict type matches.
+    """
+    return next(iter(analyze_frame(series.to_frame()).values()))
+
+# --- PROFILE CACHE ---
+@st.cache_data(show_spinner=False)
+def load_sample(file_path, mtime):
+    """Sample CSV, re-read only when the file changes"""
+    return pd.read_csv(file_path)
+
+def load_profile(file_path):
+    """Load the on-disk column profile for a sample, or start a new one if the sample changed"""
+    stat = file_path.stat()
+    profile_path = file_path.with_suffix(PROFILE_SUFFIX)
+    if profile_path.exists():
+        try:
+            with open(profile_path, 'r') as f:
+                profile = json.load(f)
+            if profile.get('mtime') == stat.st_mtime and profile.get('size') == stat.st_size:
+                return profile
+        except json.JSONDecodeError:
+            pass
+    return {'mtime': stat.st_mtime, 'size': stat.st_size, 'columns': {}}
+
+@st.cache_resource(show_spinner=False)
+def get_profile(file_path, mtime):
+    """In-memory profile shared across reruns, keyed by path + mtime"""
+    return load_profile(file_path)
+
+def save_profile(file_path, profile):
+    with open(file_path.with_suffix(PROFILE_SUFFIX), 'w') as f:
+        json.dump(profile, f)
+
+def sample_values(series):
+    """Evenly spaced samples of non-empty values"""
+    clean_samp = series.dropna().astype(str)
+    clean_samp = clean_samp[clean_samp.str.strip().str.len() > 0]
+    if len(clean_samp) > NUM_SAMPLES:
+        indices = [int(i * (len(clean_samp) - 1) / (NUM_SAMPLES - 1)) for i in range(NUM_SAMPLES)]
+        return clean_samp.iloc[indices].tolist()
+    return clean_samp.tolist()
+
+def profile_columns(df, cols):
+    """Everything the page shows for each column, in JSON-safe form (analysis runs as one batch)"""
+    analyses = analyze_frame(df[cols])
+    null_pcts = df[cols].isna().mean() * 100
+    
+    profiles = {}
+    for col in cols:
+        analysis = analyses[col]
+        profiles[col] = {
+            'analysis': {k: v for k, v in analysis.items() if k != 'dominance'},
+            'dominance': analysis['dominance'],
+            'null_pct': float(null_pcts[col]),
+            'unique_count': int(df[col].nunique()),
+            'samples': [val[:20] for val in sample_values(df[col])]
+        }
+    return profiles
+
+# --- PAGING ---
+def reset_view():
+    """Back to page 1 with a fresh filter result (file or filter changed)"""
+    st.session_state['page'] = 1
+    st.session_state.pop('filter_snapshot', None)
+
+def filter_columns(df, profile, saved_cols, selected_file, col_filter):
+    """
+    Columns matching the filter. The result is kept until the file or filter changes,
+    so columns accepted on this page don't drop out from under the user.
+    """
+    snapshot = st.session_state.get('filter_snapshot')
+    if snapshot and snapshot['key'] == [selected_file, col_filter]:
+        return snapshot['cols']
+    
+    if col_filter == "Unsaved":
+        cols = [col for col in df.columns if col not in saved_cols]
+    elif col_filter == "Low confidence":
+        cols = [col for col in df.columns if not profile['columns'][col]['analysis']['confident']]
+    else:
+        cols = list(df.columns)
+    st.session_state['filter_snapshot'] = {'key': [selected_file, col_filter], 'cols': cols}
+    return cols
+
+def page_slice(items, page_key):
+    """Page picker for a long column list; returns the items on the current page"""
+    n_pages = max(1, math.ceil(len(items) / PAGE_SIZE))
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = 1
+    page = st.selectbox("Page", range(1, n_pages + 1), key=page_key, format_func=lambda p: f"Page {p} of {n_pages}")
+    start = (page - 1) * PAGE_SIZE
+    end = min(start + PAGE_SIZE, len(items))
+    st.caption(f"Showing {start + 1 if items else 0}–{end} of {len(items)} columns")
+    return items[start:end]
+
 # --- MAIN APP ---
 def main():
     st.set_page_config(page_title="Data Type Assessor", layout="wide")
@@ -181,19 +454,28 @@ def main():
     # Load files
     csv_files = sorted(list(SAMPLE_DATA.glob("sample_*.csv")))
     file_names = [f.name for f in csv_files]
-    saved_data = load_categories()
+    saved_data = read_saved_categories()
     descriptions = load_descriptions()
     
+    # Staged edits count as saved for display; they reach disk on the next flush
+    for file_name, cols in pending_categories().items():
+        saved_data.setdefault(file_name, {}).update(cols)
+    
     # File Selector
-    col_sel, col_prog = st.columns([1, 2])
+    col_sel, col_prog, col_save = st.columns([1, 1.6, 0.4])
     with col_sel:
-        selected_file = st.selectbox("Select File", file_names, key="file_selector")
+        selected_file = st.selectbox("Select File", file_names, key="file_selector", on_change=reset_view)
+    with col_save:
+        save_status()
     
     if not selected_file: return
     
-    # Load Data
+    # Load Data (cached; analysis is reused from the on-disk profile)
     file_path = SAMPLE_DATA / selected_file
-    df = pd.read_csv(file_path)
+    mtime = file_path.stat().st_mtime
+    df = load_sample(file_path, mtime)
+    profile = get_profile(file_path, mtime)
+    profile_dirty = False
     if selected_file not in saved_data: saved_data[selected_file] = {}
     
     # Get descriptions for this file
@@ -207,14 +489,27 @@ def main():
         st.write("") 
         st.progress(saved_cols/total_cols)
     
-    st.markdown("---")
-
     # --- PROCESS COLUMNS ---
-    for col in df.columns:
-        series = df[col]
-        
-        # 1. Analyze
-        analysis = analyze_column(series)
+    # Only columns on the current page are analyzed (once per sample version, in one batch);
+    # the low-confidence filter needs the whole file analyzed first
+    col_filter = st.radio("Show", FILTERS, horizontal=True, key="col_filter", on_change=reset_view)
+    if col_filter == "Low confidence":
+        new_cols = [col for col in df.columns if col not in profile['columns']]
+        if new_cols:
+            profile['columns'].update(profile_columns(df, new_cols))
+            profile_dirty = True
+    page_cols = page_slice(filter_columns(df, profile, saved_data[selected_file], selected_file, col_filter), "page")
+    
+    new_cols = [col for col in page_cols if col not in profile['columns']]
+    if new_cols:
+        profile['columns'].update(profile_columns(df, new_cols))
+        profile_dirty = True
+    
+    st.markdown("---")
+    
+    for col in page_cols:
+        col_profile = profile['columns'][col]
+        analysis = col_profile['analysis']
         stats = analysis['stats']
         
         is_saved = col in saved_data[selected_file]
@@ -233,11 +528,15 @@ def main():
             current_cat = "string" 
             is_green = False 
             auto_msg = f"SUGGESTED: {analysis['recommended'].upper()}"
+        
+        # The shown category is accepted as-is (batched with the next flush)
+        if not is_saved:
+            stage_category(selected_file, col, current_cat)
             
         # Stats
-        dom_pct = get_dominance_stats(series)
-        null_pct = (series.isna().sum() / len(series)) * 100
-        unique_count = series.nunique()
+        dom_pct = col_profile['dominance']
+        null_pct = col_profile['null_pct']
+        unique_count = col_profile['unique_count']
         
         # Header Styling
         if current_cat == "IGNORE":
@@ -276,22 +575,15 @@ def main():
                 # Dominance (Red if > 90%)
                 dom_style = "color:red; font-weight:bold" if dom_pct > 0.9 else ""
                 st.markdown(f"Dominance: <span style='{dom_style}'>{dom_pct*100:.1f}%</span>", unsafe_allow_html=True)
+                
+                if analysis.get('date_format'):
+                    st.caption(f"Date format: {analysis['date_format']}")
             
             # Col 2: Samples (Evenly Spaced Grid)
             with c2:
-                # 1. Clean Data
-                clean_samp = series.dropna().astype(str)
-                clean_samp = clean_samp[clean_samp.str.strip().str.len() > 0]
+                head_samp = col_profile['samples']
                 
-                # 2. Evenly Spaced Sampling
-                num_samples = 50
-                if len(clean_samp) > num_samples:
-                    indices = [int(i * (len(clean_samp) - 1) / (num_samples - 1)) for i in range(num_samples)]
-                    head_samp = clean_samp.iloc[indices].tolist()
-                else:
-                    head_samp = clean_samp.tolist()
-                
-                # 3. Format: Grid of 4 columns (Widened for readability)
+                # Format: Grid of 4 columns (Widened for readability)
                 chunk_size = 4
                 lines = []
                 for i in range(0, len(head_samp), chunk_size):
@@ -313,21 +605,20 @@ def main():
                     if option == "IGNORE": return "IGNORE"
                     return f"{option} ({score*100:.0f}%)"
 
-                new_cat = st.radio(
+                st.radio(
                     "Type",
                     CATEGORIES,
                     key=f"rad_{col}",
                     index=CATEGORIES.index(current_cat) if current_cat in CATEGORIES else 3,
                     label_visibility="collapsed",
-                    format_func=format_option 
+                    format_func=format_option,
+                    on_change=on_category_change,
+                    args=(selected_file, col)
                 )
-                
-                if new_cat != saved_val:
-                    save_single_category(selected_file, col, new_cat)
-                    if not is_saved:
-                        st.rerun()
-                    else:
-                        st.toast(f"Updated {col} -> {new_cat}")
+
+    if profile_dirty:
+        save_profile(file_path, profile)
+    flush_if_due()
 
     st.markdown("---")
 
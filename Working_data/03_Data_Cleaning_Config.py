@@ -3,7 +3,13 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import json
-import matplotlib.pyplot as plt
+import math
+import os
+import time
+import contextlib
+import altair as alt
+from date_sniffer import sniff_date_format, parse_dates
+from cleaning_kernel import parse_numeric, column_stats, clean_column
 
 # --- CONFIGURATION ---
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -12,6 +18,21 @@ SAMPLE_DATA = WORKING_DATA / "Sample_Data"
 CATEGORIES_FILE = WORKING_DATA / "02_Data_Categories.json"
 CLEANING_FILE = WORKING_DATA / "04_Data_Cleaning_actions.json"
 DESCRIPTIONS_FILE = WORKING_DATA / "00_column_descriptions.json"
+PAGE_SIZE = 10  # Columns (each with a plot) rendered per page
+FILTERS = ["All", "Has issues", "Unsaved"]
+MAX_PLOT_POINTS = 2000  # Normal points drawn per chart (issue points are always drawn)
+LOCK_TIMEOUT_SECONDS = 10.0  # Give up waiting for another session's save after this long
+LOCK_STALE_SECONDS = 30.0  # A lock file older than this was left behind by a crashed session
+
+# Point colors; later issues override earlier ones when a row has several
+ISSUE_COLORS = {
+    'Normal': 'green',
+    'Missing (filled)': 'cyan',
+    'Parse error (filled)': 'purple',
+    'Outlier': 'yellow',
+    'Negative': 'red'
+}
+ISSUE_LABELS = [('missing', 'Missing (filled)'), ('parsing_errors', 'Parse error (filled)'), ('outliers', 'Outlier'), ('negatives', 'Negative')]
 
 # --- STORAGE FUNCTIONS ---
 def load_categories():
@@ -41,35 +62,135 @@ def load_descriptions():
             return {}
     return {}
 
-def save_cleaning_actions(actions):
-    with open(CLEANING_FILE, 'w') as f:
-        json.dump(actions, f, indent=2)
+@contextlib.contextmanager
+def config_lock():
+    """Lock file next to the config so concurrent sessions take turns writing it"""
+    lock_path = CLEANING_FILE.with_suffix('.lock')
+    deadline = time.time() + LOCK_TIMEOUT_SECONDS
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock_path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"{CLEANING_FILE.name} is locked by another session")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        lock_path.unlink(missing_ok=True)
+
+def save_file_actions(file_name, file_actions):
+    """Merge one file's plan into the latest config on disk and replace it atomically"""
+    with config_lock():
+        # Re-read under the lock so other sessions' saved plans aren't overwritten
+        current_data = load_cleaning_actions()
+        current_data[file_name] = file_actions
+        
+        tmp_path = CLEANING_FILE.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(current_data, f, indent=2)
+        os.replace(tmp_path, CLEANING_FILE)
+
+@st.cache_data(show_spinner=False)
+def load_sample(file_path, mtime):
+    """Sample CSV, re-read only when the file changes"""
+    return pd.read_csv(file_path)
+
+def default_actions(category):
+    if category == 'date':
+        return {
+            'category': category,
+            'parsing_errors': 'keep',
+            'outliers': 'keep',
+            'missing': 'keep',
+            'min_date': None,
+            'max_date': None
+        }
+    return {  # int or float
+        'category': category,
+        'parsing_errors': 'keep',
+        'outliers': 'keep',
+        'negatives': 'keep',
+        'missing': 'keep',
+        'outlier_threshold': 3.0
+    }
+
+@st.cache_data(show_spinner=False)
+def date_range(file_path, mtime, col_name, date_format):
+    """Earliest/latest parsed date in a sample column, as YYYY-MM-DD (None if nothing parses)"""
+    valid_dates = parse_dates(load_sample(file_path, mtime)[col_name], date_format).dropna()
+    if len(valid_dates) == 0:
+        return None, None
+    return valid_dates.min().strftime('%Y-%m-%d'), valid_dates.max().strftime('%Y-%m-%d')
+
+def init_column_actions(file_actions, file_path, mtime, col_name, category):
+    """Give a column its default plan, so columns on other pages are still saved complete"""
+    if col_name not in file_actions:
+        file_actions[col_name] = default_actions(category)
+    col_actions = file_actions[col_name]
+    
+    if category == 'date':
+        # Detect the date format once; 05_Apply_Cleaning reuses it on the full data
+        if 'date_format' not in col_actions:
+            col_actions['date_format'] = sniff_date_format(load_sample(file_path, mtime)[col_name])
+        
+        # Default range is the full range of the sample
+        if col_actions['min_date'] is None or col_actions['max_date'] is None:
+            min_date, max_date = date_range(file_path, mtime, col_name, col_actions['date_format'])
+            if col_actions['min_date'] is None:
+                col_actions['min_date'] = min_date
+            if col_actions['max_date'] is None:
+                col_actions['max_date'] = max_date
+
+@st.cache_data(show_spinner=False)
+def count_issues(file_path, mtime, col_name, category, outlier_threshold=3.0, min_date=None, max_date=None, date_format=None):
+    """Total issues in a column for the "Has issues" filter (cached per column and settings)"""
+    series = load_sample(file_path, mtime)[col_name]
+    if category == 'date':
+        min_dt = pd.Timestamp(min_date) if min_date else None
+        max_dt = pd.Timestamp(max_date) if max_date else None
+        issues, _ = analyze_date_column(series, min_dt, max_dt, date_format)
+    else:
+        issues, _ = analyze_int_column(series, outlier_threshold)
+    return sum(int(mask.sum()) for mask in issues.values())
+
+# --- PAGING ---
+def reset_page(page_key):
+    st.session_state[page_key] = 1
+
+def page_slice(items, page_key):
+    """Page picker for a long column list; returns the items on the current page"""
+    n_pages = max(1, math.ceil(len(items) / PAGE_SIZE))
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = 1
+    page = st.selectbox("Page", range(1, n_pages + 1), key=page_key, format_func=lambda p: f"Page {p} of {n_pages}")
+    start = (page - 1) * PAGE_SIZE
+    end = min(start + PAGE_SIZE, len(items))
+    st.caption(f"Showing {start + 1 if items else 0}–{end} of {len(items)} columns")
+    return items[start:end]
 
 # --- ANALYSIS FUNCTIONS ---
 def analyze_int_column(series, outlier_threshold=3.0):
-    """Analyze integer column for issues"""
+    """Analyze integer column for issues (boolean masks aligned with the series)"""
+    # Get clean numeric values (same parsing as 05_Apply_Cleaning)
+    numeric = pd.Series(parse_numeric(series), index=series.index)
+    
     issues = {
-        'parsing_errors': [],
-        'outliers': [],
-        'negatives': [],
-        'missing': []
+        'parsing_errors': numeric.isna() & series.notna(),
+        'outliers': pd.Series(False, index=series.index),
+        'negatives': numeric < 0,
+        'missing': series.isna()
     }
     
-    # Get clean numeric values
-    clean_str = series.astype(str).str.replace(r'[$,\s]', '', regex=True)
-    numeric = pd.to_numeric(clean_str, errors='coerce')
-    
-    # Parsing errors
-    parsing_errors_mask = numeric.isna() & series.notna()
-    if parsing_errors_mask.any():
-        issues['parsing_errors'] = series[parsing_errors_mask].index.tolist()
-    
-    # Missing values
-    missing_mask = series.isna()
-    if missing_mask.any():
-        issues['missing'] = series[missing_mask].index.tolist()
-    
-    # Outliers and negatives (only on valid numeric)
+    # Outliers (only on valid numeric)
     valid_numeric = numeric.dropna()
     if len(valid_numeric) > 0:
         mean = valid_numeric.mean()
@@ -78,211 +199,89 @@ def analyze_int_column(series, outlier_threshold=3.0):
         if std > 0:
             lower = mean - outlier_threshold * std
             upper = mean + outlier_threshold * std
-            outliers_mask = (numeric > upper) | (numeric < lower)
-            if outliers_mask.any():
-                issues['outliers'] = numeric[outliers_mask].index.tolist()
-        
-        # Negatives
-        negatives_mask = numeric < 0
-        if negatives_mask.any():
-            issues['negatives'] = numeric[negatives_mask].index.tolist()
+            issues['outliers'] = (numeric > upper) | (numeric < lower)
     
     return issues, numeric
 
-def analyze_date_column(series, min_date=None, max_date=None):
-    """Analyze date column for issues"""
+def analyze_date_column(series, min_date=None, max_date=None, date_format=None):
+    """Analyze date column for issues (boolean masks; date_format: detected format, parsed in one vectorized pass)"""
+    date_series = parse_dates(series, date_format)
+    
     issues = {
-        'parsing_errors': [],
-        'outliers': [],
-        'missing': []
+        'parsing_errors': date_series.isna() & series.notna(),
+        'outliers': pd.Series(False, index=series.index),
+        'missing': series.isna()
     }
     
-    date_series = pd.to_datetime(series, errors='coerce')
-    
-    # Parsing errors
-    parsing_errors_mask = date_series.isna() & series.notna()
-    if parsing_errors_mask.any():
-        issues['parsing_errors'] = series[parsing_errors_mask].index.tolist()
-    
-    # Missing values
-    missing_mask = series.isna()
-    if missing_mask.any():
-        issues['missing'] = series[missing_mask].index.tolist()
-    
     # Outliers (if range specified)
     if min_date is not None and max_date is not None:
-        outliers_mask = (date_series < min_date) | (date_series > max_date)
-        if outliers_mask.any():
-            issues['outliers'] = date_series[outliers_mask].index.tolist()
+        issues['outliers'] = (date_series < min_date) | (date_series > max_date)
     
     return issues, date_series
 
-def create_scatter_plot(numeric_series, issues, is_date=False):
-    """Create scatter plot with color coding"""
-    plt.style.use('dark_background')
-    fig, ax = plt.subplots(figsize=(8, 6))
-    fig.patch.set_facecolor('#0E1117')
-    ax.set_facecolor('#0E1117')
-    
-    # Use SEQUENTIAL indices for x-axis (0, 1, 2, ...)
-    x_positions = list(range(len(numeric_series)))
-    values = numeric_series.values
-    
-    # Create mapping from original indices to sequential positions
-    original_to_sequential = {orig_idx: seq_idx for seq_idx, orig_idx in enumerate(numeric_series.index)}
-    
-    # Default: all green (normal)
-    colors = ['green'] * len(values)
-    
-    # Map original indices to sequential positions for coloring
-    # Priority order matters - later colors override earlier ones
-    
-    for orig_idx in issues.get('missing', []):
-        if orig_idx in original_to_sequential:
-            seq_idx = original_to_sequential[orig_idx]
-            colors[seq_idx] = 'cyan'
-    
-    for orig_idx in issues.get('parsing_errors', []):
-        if orig_idx in original_to_sequential:
-            seq_idx = original_to_sequential[orig_idx]
-            colors[seq_idx] = 'purple'
-    
-    for orig_idx in issues.get('outliers', []):
-        if orig_idx in original_to_sequential:
-            seq_idx = original_to_sequential[orig_idx]
-            colors[seq_idx] = 'yellow'
-    
-    for orig_idx in issues.get('negatives', []):
-        if orig_idx in original_to_sequential:
-            seq_idx = original_to_sequential[orig_idx]
-            colors[seq_idx] = 'red'
-    
-    # Plot with sequential x positions
-    ax.scatter(x_positions, values, c=colors, alpha=0.6, s=20)
-    ax.set_xlabel('Index', color='white')
-    ax.set_ylabel('Value', color='white')
-    ax.grid(True, alpha=0.2, color='gray')
-    ax.tick_params(colors='white')
-    
-    # Format Y-axis as dates if needed
-    if is_date:
-        from matplotlib.dates import DateFormatter
-        import matplotlib.dates as mdates
-        # Convert numeric back to dates for Y-axis labels
-        ax.yaxis.set_major_formatter(DateFormatter('%Y-%m-%d'))
-        ax.yaxis.set_major_locator(mdates.AutoDateLocator())
-        fig.autofmt_xdate()  # Rotate date labels
-    
-    # Legend horizontal below the plot
-    from matplotlib.patches import Patch
-    legend_elements = [
-        Patch(facecolor='green', label='Normal'),
-        Patch(facecolor='red', label='Negative'),
-        Patch(facecolor='yellow', label='Outlier'),
-        Patch(facecolor='purple', label='Parse error (filled)'),
-        Patch(facecolor='cyan', label='Missing (filled)')
-    ]
-    ax.legend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, -0.12),
-             fancybox=False, shadow=False, ncol=5, facecolor='#0E1117', edgecolor='white')
-    
-    # Adjust layout to make room for legend
-    plt.tight_layout()
-    
-    return fig
+def downsample_minmax(values, is_issue, max_points):
+    """
+    Positions to draw: every issue point, plus the min and max of each bucket
+    of normal points (min-max bucketing keeps the shape of the series).
+    """
+    positions = np.arange(len(values))
+    normal = ~is_issue & ~np.isnan(values)
+    if normal.sum() <= max_points:
+        return positions[is_issue | normal]
+    
+    # Bucket normal points by position, sort by (bucket, value): first/last of each bucket are min/max
+    normal_pos = positions[normal]
+    buckets = normal_pos * (max_points // 2) // len(values)
+    order = np.lexsort((values[normal_pos], buckets))
+    sorted_buckets = buckets[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    lasts = np.r_[firsts[1:] - 1, len(order) - 1]
+    kept = normal_pos[order[np.r_[firsts, lasts]]]
+    
+    return np.union1d(positions[is_issue], kept)
 
-def apply_preview_actions(series, numeric_series, actions, outlier_threshold=3):
-    """Apply actions and return preview of results"""
-    preview_series = numeric_series.copy()
-    
-    # Parse errors
-    if actions.get('parsing_errors') == 'strip':
-        pass  # Already converted
-    elif actions.get('parsing_errors') == 'remove':
-        preview_series = preview_series[preview_series.notna()]
-    elif actions.get('parsing_errors') == 'mean':
-        # Calculate mean from VALID values only (exclude NaN parse errors)
-        valid_values = preview_series.dropna()
-        if len(valid_values) > 0:
-            mean_val = valid_values.mean()
-            preview_series = preview_series.fillna(mean_val)
-    elif actions.get('parsing_errors') == 'median':
-        # Calculate median from VALID values only (exclude NaN parse errors)
-        valid_values = preview_series.dropna()
-        if len(valid_values) > 0:
-            median_val = valid_values.median()
-            preview_series = preview_series.fillna(median_val)
-    
-    # Outliers
-    if len(preview_series) > 0:
-        mean = preview_series.mean()
-        std = preview_series.std()
-        
-        if std > 0:
-            lower = mean - outlier_threshold * std
-            upper = mean + outlier_threshold * std
-            outlier_mask = (preview_series > upper) | (preview_series < lower)
-            
-            if actions.get('outliers') == 'remove':
-                preview_series = preview_series[~outlier_mask]
-            elif actions.get('outliers') == 'mean':
-                preview_series[outlier_mask] = mean
-            elif actions.get('outliers') == 'median':
-                preview_series[outlier_mask] = preview_series.median()
-            elif actions.get('outliers') == 'cap':
-                preview_series = preview_series.clip(lower=lower, upper=upper)
-    
-    # Negatives
-    if actions.get('negatives') == 'remove':
-        neg_mask = preview_series < 0
-        preview_series = preview_series[~neg_mask]
-    elif actions.get('negatives') == 'absolute':
-        preview_series = preview_series.abs()
-    elif actions.get('negatives') == 'mean':
-        neg_mask = preview_series < 0
-        if neg_mask.any():
-            preview_series[neg_mask] = preview_series.mean()
-    elif actions.get('negatives') == 'median':
-        neg_mask = preview_series < 0
-        if neg_mask.any():
-            preview_series[neg_mask] = preview_series.median()
+def create_scatter_chart(series, issues, is_date=False):
+    """Interactive scatter with color coding (downsampled for display)"""
+    # Plot values as floats (dates as ns since epoch), NaN/NaT are skipped
+    if is_date:
+        values = series.to_numpy(dtype='datetime64[ns]')
+        missing = np.isnat(values)
+        values = values.astype('int64').astype(float)
+        values[missing] = np.nan
+    else:
+        values = series.to_numpy(dtype=float)
+    
+    # Label points by issue (masks are aligned to the rows left in the preview)
+    labels = np.full(len(values), 'Normal', dtype=object)
+    for issue, label in ISSUE_LABELS:
+        if issue in issues:
+            labels[issues[issue].reindex(series.index, fill_value=False).to_numpy()] = label
+    
+    positions = downsample_minmax(values, labels != 'Normal', MAX_PLOT_POINTS)
+    data = pd.DataFrame({'Index': positions, 'Value': values[positions], 'Issue': labels[positions]})
+    data = data[data['Value'].notna()]
+    if is_date:
+        data['Value'] = pd.to_datetime(data['Value'].astype('int64'))
     
-    # Missing
-    if actions.get('missing') == 'remove':
-        preview_series = preview_series.dropna()
-    elif actions.get('missing') == 'mean':
-        preview_series = preview_series.fillna(preview_series.mean())
-    elif actions.get('missing') == 'median':
-        preview_series = preview_series.fillna(preview_series.median())
+    chart = alt.Chart(data).mark_circle(size=20, opacity=0.6).encode(
+        x=alt.X('Index:Q'),
+        y=alt.Y('Value:T' if is_date else 'Value:Q', scale=alt.Scale(zero=False)),
+        color=alt.Color('Issue:N', scale=alt.Scale(domain=list(ISSUE_COLORS), range=list(ISSUE_COLORS.values())), legend=alt.Legend(orient='bottom', title=None)),
+        tooltip=['Index:Q', 'Value:T' if is_date else 'Value:Q', 'Issue:N']
+    ).properties(height=450).interactive()
     
-    return preview_series
+    return chart
 
-def apply_preview_actions_date(series, date_series, actions, min_date=None, max_date=None):
-    """Apply actions to date column and return preview"""
-    preview_series = date_series.copy()
-    
-    # Parse errors
-    if actions.get('parsing_errors') == 'remove':
-        preview_series = preview_series[preview_series.notna()]
-    elif actions.get('parsing_errors') == 'interpolate':
-        preview_series = preview_series.interpolate(method='linear')
-    
-    # Outliers
-    if min_date is not None and max_date is not None:
-        outlier_mask = (preview_series < min_date) | (preview_series > max_date)
-        
-        if actions.get('outliers') == 'remove':
-            preview_series = preview_series[~outlier_mask]
-        elif actions.get('outliers') == 'interpolate':
-            preview_series[outlier_mask] = pd.NaT
-            preview_series = preview_series.interpolate(method='linear')
-    
-    # Missing
-    if actions.get('missing') == 'remove':
-        preview_series = preview_series.dropna()
-    elif actions.get('missing') == 'interpolate':
-        preview_series = preview_series.interpolate(method='linear')
-    
-    return preview_series
+def preview_cleaning(series, category, actions):
+    """
+    Run the same cleaning kernel as 05_Apply_Cleaning on the sample column.
+    Numeric fills/bounds use stats of the whole sample, as 05 uses stats of the whole file
+    (fills from the values that survive the outlier/negative rules).
+    Returns: cleaned values of the rows that survive
+    """
+    col_stats = column_stats(parse_numeric(series), actions) if category != 'date' else None
+    values, keep, _ = clean_column(series, category, actions, col_stats)
+    return pd.Series(values[keep], index=series.index[keep])
 
 # --- MAIN APP ---
 def main():
@@ -306,9 +305,12 @@ def main():
     st.title("🧹 Data Cleaning Configurator")
     st.markdown("Configure cleaning actions. No changes applied until you run apply_cleaning.py")
     
-    # Load data
+    # Load data (the plan being edited lives in the session, so columns on other pages keep their edits)
     categories = load_categories()
-    cleaning_actions = load_cleaning_actions()
+    saved_actions = load_cleaning_actions()
+    if 'cleaning_actions' not in st.session_state:
+        st.session_state['cleaning_actions'] = load_cleaning_actions()
+    cleaning_actions = st.session_state['cleaning_actions']
     descriptions = load_descriptions()
     
     if not categories:
@@ -319,13 +321,15 @@ def main():
     csv_files = sorted(list(SAMPLE_DATA.glob("sample_*.csv")))
     file_names = [f.name for f in csv_files]
     
-    selected_file = st.selectbox("Select File", file_names)
+    selected_file = st.selectbox("Select File", file_names, on_change=reset_page, args=("page",))
     
     if not selected_file:
         return
     
     # Load CSV
-    df = pd.read_csv(SAMPLE_DATA / selected_file)
+    file_path = SAMPLE_DATA / selected_file
+    mtime = file_path.stat().st_mtime
+    df = load_sample(file_path, mtime)
     
     # Get descriptions for this file
     file_descriptions = descriptions.get(selected_file, {})
@@ -333,18 +337,35 @@ def main():
     # Initialize cleaning actions for this file
     if selected_file not in cleaning_actions:
         cleaning_actions[selected_file] = {}
+    file_actions = cleaning_actions[selected_file]
     
-    # Get categorized columns
+    # Get categorized columns (int, float, date, and IGNORE)
     file_categories = categories.get(selected_file, {})
+    target_cols = [col for col in df.columns if file_categories.get(col) in ['int', 'float', 'date', 'IGNORE']]
+    for col_name in target_cols:
+        if file_categories[col_name] != 'IGNORE':
+            init_column_actions(file_actions, file_path, mtime, col_name, file_categories[col_name])
+    
+    # Filter, then render one page of columns
+    col_filter = st.radio("Show", FILTERS, horizontal=True, key="col_filter", on_change=reset_page, args=("page",))
+    if col_filter == "Has issues":
+        target_cols = [
+            col for col in target_cols
+            if file_categories[col] != 'IGNORE' and count_issues(
+                file_path, mtime, col, file_categories[col],
+                file_actions[col].get('outlier_threshold', 3.0), file_actions[col].get('min_date'),
+                file_actions[col].get('max_date'), file_actions[col].get('date_format')
+            ) > 0
+        ]
+    elif col_filter == "Unsaved":
+        file_saved = saved_actions.get(selected_file, {})
+        target_cols = [col for col in target_cols if file_categories[col] != 'IGNORE' and file_actions[col] != file_saved.get(col)]
+    page_cols = page_slice(target_cols, "page")
     
     st.markdown("---")
     
-    # Process int, float, date, and IGNORE columns
-    for col_name in df.columns:
-        category = file_categories.get(col_name, "Not Categorized")
-        
-        if category not in ['int', 'float', 'date', 'IGNORE']:
-            continue
+    for col_name in page_cols:
+        category = file_categories[col_name]
         
         # Display IGNORE columns differently
         if category == 'IGNORE':
@@ -370,51 +391,20 @@ def main():
         else:
             st.subheader(f"📊 {col_name} ({category})")
         
-        # Initialize actions for this column
-        if col_name not in cleaning_actions[selected_file]:
-            if category == 'date':
-                cleaning_actions[selected_file][col_name] = {
-                    'category': category,
-                    'parsing_errors': 'keep',
-                    'outliers': 'keep',
-                    'missing': 'keep',
-                    'min_date': None,
-                    'max_date': None
-                }
-            else:  # int or float
-                cleaning_actions[selected_file][col_name] = {
-                    'category': category,
-                    'parsing_errors': 'keep',
-                    'outliers': 'keep',
-                    'negatives': 'keep',
-                    'missing': 'keep',
-                    'outlier_threshold': 3.0
-                }
-        
-        col_actions = cleaning_actions[selected_file][col_name]
+        col_actions = file_actions[col_name]
         
         # Analyze based on type
         if category == 'date':
-            # Parse dates to get default range
-            temp_dates = pd.to_datetime(df[col_name], errors='coerce')
-            valid_dates = temp_dates.dropna()
-            
-            # Set default min/max if not set
-            if col_actions['min_date'] is None and len(valid_dates) > 0:
-                col_actions['min_date'] = valid_dates.min().strftime('%Y-%m-%d')
-            if col_actions['max_date'] is None and len(valid_dates) > 0:
-                col_actions['max_date'] = valid_dates.max().strftime('%Y-%m-%d')
-            
             # Analyze with date range
             min_dt = pd.Timestamp(col_actions['min_date']) if col_actions['min_date'] else None
             max_dt = pd.Timestamp(col_actions['max_date']) if col_actions['max_date'] else None
-            issues, date_series = analyze_date_column(df[col_name], min_dt, max_dt)
+            issues, date_series = analyze_date_column(df[col_name], min_dt, max_dt, col_actions['date_format'])
         else:
             # Analyze numeric
             issues, numeric_series = analyze_int_column(df[col_name], col_actions['outlier_threshold'])
         
         # Count issues
-        total_issues = sum(len(v) for v in issues.values())
+        total_issues = sum(int(mask.sum()) for mask in issues.values())
         
         # For dates, always show controls (to adjust range)
         # For numeric, skip if no issues
@@ -431,11 +421,13 @@ def main():
             
             if category == 'date':
                 # === DATE COLUMN HANDLING ===
+                st.caption(f"📅 Format: `{col_actions['date_format']}`" if col_actions['date_format'] else "📅 Format: mixed (parsed per value)")
+                
                 # Parsing errors
-                if len(issues['parsing_errors']) > 0:
-                    st.markdown(f"🔴 **Parse Errors:** {len(issues['parsing_errors'])} rows")
+                if issues['parsing_errors'].any():
+                    st.markdown(f"🔴 **Parse Errors:** {issues['parsing_errors'].sum()} rows")
                     with st.expander("👁️ View problem samples"):
-                        samples = df.loc[issues['parsing_errors'][:10], col_name]
+                        samples = df.loc[issues['parsing_errors'], col_name].head(10)
                         for idx, val in samples.items():
                             st.text(f"{val} (row {idx})")
                     parse_action = st.radio(
@@ -467,10 +459,10 @@ def main():
                 if new_min != col_actions['min_date'] or new_max != col_actions['max_date']:
                     col_actions['min_date'] = new_min
                     col_actions['max_date'] = new_max
-                    issues, date_series = analyze_date_column(df[col_name], pd.Timestamp(new_min), pd.Timestamp(new_max))
+                    issues, date_series = analyze_date_column(df[col_name], pd.Timestamp(new_min), pd.Timestamp(new_max), col_actions['date_format'])
                 
-                if len(issues['outliers']) > 0:
-                    st.caption(f"{len(issues['outliers'])} dates outside range")
+                if issues['outliers'].any():
+                    st.caption(f"{issues['outliers'].sum()} dates outside range")
                     outlier_action = st.radio(
                         "Action:",
                         ['keep', 'remove', 'interpolate'],
@@ -482,8 +474,8 @@ def main():
                 st.markdown("---")
                 
                 # Missing
-                if len(issues['missing']) > 0:
-                    st.markdown(f"⚪ **Missing:** {len(issues['missing'])} rows")
+                if issues['missing'].any():
+                    st.markdown(f"⚪ **Missing:** {issues['missing'].sum()} rows")
                     miss_action = st.radio(
                         "Action:",
                         ['keep', 'remove', 'interpolate'],
@@ -496,10 +488,10 @@ def main():
             else:
                 # === NUMERIC COLUMN HANDLING ===
                 # Parsing errors
-                if len(issues['parsing_errors']) > 0:
-                    st.markdown(f"🔴 **Parse Errors:** {len(issues['parsing_errors'])} rows")
+                if issues['parsing_errors'].any():
+                    st.markdown(f"🔴 **Parse Errors:** {issues['parsing_errors'].sum()} rows")
                     with st.expander("👁️ View problem samples"):
-                        samples = df.loc[issues['parsing_errors'][:10], col_name]
+                        samples = df.loc[issues['parsing_errors'], col_name].head(10)
                         for idx, val in samples.items():
                             st.text(f"{val} (row {idx})")
                     parse_action = st.radio(
@@ -513,20 +505,16 @@ def main():
                     st.markdown("---")
                 
                 # Sample of normal rows
-                normal_indices = [i for i in range(len(df[col_name])) 
-                                if i not in issues['parsing_errors'] 
-                                and i not in issues['outliers']
-                                and i not in issues['negatives']
-                                and i not in issues['missing']]
-                if len(normal_indices) > 0:
+                normal_mask = ~(issues['parsing_errors'] | issues['outliers'] | issues['negatives'] | issues['missing'])
+                if normal_mask.any():
                     with st.expander("👁️ View normal value samples"):
-                        sample_normal = df[col_name].iloc[normal_indices[:10]]
+                        sample_normal = df[col_name][normal_mask].head(10)
                         for idx, val in sample_normal.items():
                             st.text(f"{val} (row {idx})")
                     st.markdown("---")
                 
                 # Outliers
-                if len(issues['outliers']) > 0:
+                if issues['outliers'].any():
                     st.markdown(f"🟡 **Outliers**")
                     threshold = st.slider(f"Threshold", 1.0, 5.0, col_actions['outlier_threshold'], key=f"{col_name}_thresh", step=0.1)
                     mean = numeric_series.mean()
@@ -552,8 +540,8 @@ def main():
                     st.markdown("---")
                 
                 # Negatives
-                if len(issues['negatives']) > 0:
-                    st.markdown(f"🔴 **Negatives:** {len(issues['negatives'])} rows")
+                if issues['negatives'].any():
+                    st.markdown(f"🔴 **Negatives:** {issues['negatives'].sum()} rows")
                     neg_action = st.radio(
                         "Action:",
                         ['keep', 'remove', 'absolute', 'mean', 'median'],
@@ -565,8 +553,8 @@ def main():
                     st.markdown("---")
                 
                 # Missing
-                if len(issues['missing']) > 0:
-                    st.markdown(f"⚪ **Missing:** {len(issues['missing'])} rows")
+                if issues['missing'].any():
+                    st.markdown(f"⚪ **Missing:** {issues['missing'].sum()} rows")
                     miss_action = st.radio(
                         "Action:",
                         ['keep', 'remove', 'mean', 'median'],
@@ -579,44 +567,21 @@ def main():
         with plot_col:
             if category == 'date':
                 # Date preview
-                min_dt = pd.Timestamp(col_actions['min_date']) if col_actions['min_date'] else None
-                max_dt = pd.Timestamp(col_actions['max_date']) if col_actions['max_date'] else None
+                preview_series = preview_cleaning(df[col_name], category, col_actions)
                 
-                preview_series = apply_preview_actions_date(df[col_name], date_series, col_actions, min_dt, max_dt)
-                
-                # Convert to numeric for plotting
-                numeric_dates = preview_series.astype('int64') / 10**9 / 86400
-                
-                preview_issues = {
-                    'parsing_errors': [],
-                    'outliers': issues['outliers'],
-                    'negatives': [],
-                    'missing': []
-                }
+                preview_issues = {'outliers': issues['outliers']}
                 
                 if col_actions['parsing_errors'] == 'interpolate':
                     preview_issues['parsing_errors'] = issues['parsing_errors']
                 if col_actions['missing'] == 'interpolate':
                     preview_issues['missing'] = issues['missing']
                 
-                fig = create_scatter_plot(numeric_dates, preview_issues, is_date=True)
-                st.pyplot(fig)
-                plt.close(fig)
+                st.altair_chart(create_scatter_chart(preview_series, preview_issues, is_date=True), width="stretch")
             else:
                 # Numeric preview
-                preview_series = apply_preview_actions(
-                    df[col_name], 
-                    numeric_series, 
-                    col_actions,
-                    col_actions['outlier_threshold']
-                )
+                preview_series = preview_cleaning(df[col_name], category, col_actions)
                 
-                preview_issues = {
-                    'parsing_errors': [],
-                    'outliers': issues['outliers'],
-                    'negatives': issues['negatives'],
-                    'missing': []
-                }
+                preview_issues = {'outliers': issues['outliers'], 'negatives': issues['negatives']}
                 
                 if col_actions['parsing_errors'] in ['mean', 'median']:
                     preview_issues['parsing_errors'] = issues['parsing_errors']
@@ -624,16 +589,18 @@ def main():
                 if col_actions['missing'] in ['mean', 'median']:
                     preview_issues['missing'] = issues['missing']
                 
-                fig = create_scatter_plot(preview_series, preview_issues)
-                st.pyplot(fig)
-                plt.close(fig)
+                st.altair_chart(create_scatter_chart(preview_series, preview_issues), width="stretch")
         
         st.markdown("---")
     
     # Save button
     if st.button("💾 Save Cleaning Plan", type="primary"):
-        save_cleaning_actions(cleaning_actions)
-        st.success(f"✅ Cleaning plan saved to {CLEANING_FILE}")
+        try:
+            save_file_actions(selected_file, cleaning_actions[selected_file])
+        except TimeoutError as e:
+            st.error(f"❌ Not saved: {e}. Try again in a moment.")
+            return
+        st.success(f"✅ Cleaning plan for {selected_file} saved to {CLEANING_FILE}")
         st.info("Run `python apply_cleaning.py` to apply these changes")
 
 if __name__ == "__main__":
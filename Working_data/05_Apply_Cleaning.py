@@ -4,6 +4,29 @@ from pathlib import Path
 import json
 from datetime import datetime
 import sys
+import os
+import time
+import io
+import argparse
+import cProfile
+import pstats
+import contextlib
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.csv as pacsv
+from csv_records import read_header, iter_record_chunks
+from date_sniffer import sniff_date_format
+from cleaning_kernel import STAT_KEYS, parse_numeric, as_int_values, uses_fill_stats, fill_basis, fill_stats, SeamStitcher
+from profiling import PhaseTimer, merge_phases, peak_rss_mb, current_rss_mb, write_chrome_trace
+from build_cache import BuildCache, build_key
+from chunk_sizing import ChunkSizer, estimate_row_bytes
+from raw_files import find_csv_files, name_collisions, csv_name, compression_of, compressed_suffix, open_raw, open_output
+from checkpoints import CheckpointJournal, checkpoint_path, load_checkpoint
+from cleaning_plan import resolve_config_key, plan_key, compile_plan, load_cached_plan, save_plan
 
 # --- CONFIGURATION ---
 PROJECT_ROOT = Path(__file__).parent.parent  # Script is in Working_data, parent is project root
@@ -12,7 +35,25 @@ RAW_DATA = WORKING_DATA / "Raw_Data"
 CLEANED_DATA = WORKING_DATA / "Cleaned_Data"
 CATEGORIES_FILE = WORKING_DATA / "02_Data_Categories.json"
 CLEANING_FILE = WORKING_DATA / "04_Data_Cleaning_actions.json"
-CHUNK_SIZE = 50000  # Process 50k rows at a time
+BUILD_CACHE_FILE = WORKING_DATA / ".build_cache.json"  # Raw files cleaned before with the same inputs are skipped
+MEMORY_BUDGET_MB = 1024  # Memory for chunks in flight, split across files cleaned in parallel; rows per chunk are sized to fit
+PROBE_ROWS = 2000  # Rows parsed up front to estimate memory per row
+DATE_SNIFF_ROWS = 50000  # Rows read to detect date formats
+ROW_GROUP_SIZE = 50000  # Parquet row group / Arrow record batch size
+STRING_DTYPE = "string[pyarrow]"  # dtype for string columns ("category" suits low-cardinality data)
+QUANTILE_COMPRESSION = 1000  # t-digest size; higher = more accurate medians
+EXACT_FILL_SHARE = 0.5  # Share of a file's memory budget pass 1 may hold values in for exact mean/median fills
+MAX_WORKERS = os.cpu_count() or 1  # Files cleaned in parallel (1 = one after another)
+CHUNK_WORKERS = os.cpu_count() or 1  # Chunks of one file cleaned in parallel (used when files run one at a time)
+
+# Output format: "csv", "parquet" or "arrow" (Arrow IPC / Feather v2)
+OUTPUT_FORMAT = "csv"
+PARQUET_COMPRESSION = "snappy"  # snappy, zstd, gzip, brotli, lz4 or none
+ARROW_COMPRESSION = "lz4"  # lz4, zstd or none
+STRINGS_AS_DICTIONARY = True  # Parquet: store string columns dictionary-encoded (loads as pandas category)
+OUTPUT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+DATE_OUTPUT_FORMAT = "%Y-%m-%d %H:%M:%S"  # CSV dates; fixed so chunk boundaries can't change the text
+CSV_COMPRESSION = None  # CSV output: None, "gzip", "bz2" or "zstd" (compressed output can't be checkpointed)
 
 # Create output folder
 CLEANED_DATA.mkdir(exist_ok=True)
@@ -33,35 +74,18 @@ def load_json(filepath):
 # --- VALIDATION ---
 def validate_configs(categories, cleaning_actions, csv_filename):
     """Validate that all non-string columns have cleaning actions"""
-    # Remove "sample_" prefix for lookup
-    lookup_name = csv_filename.replace("sample_", "") if csv_filename.startswith("sample_") else csv_filename
-    
-    # Try with and without sample_ prefix
-    cat_key = None
-    for key in categories.keys():
-        if key == csv_filename or key == lookup_name or key.replace("sample_", "") == csv_filename.replace("sample_", ""):
-            cat_key = key
-            break
-    
+    # Keys may differ by a "sample_" prefix (configs are built from samples)
+    cat_key = resolve_config_key(categories, csv_filename)
     if not cat_key:
         print(f"❌ ERROR: {csv_filename} not found in categories!")
         return False
     
-    file_categories = categories[cat_key]
+    action_key = resolve_config_key(cleaning_actions, csv_filename, cat_key)
+    file_actions = cleaning_actions.get(action_key, {}) if action_key else {}
     
     # Check for non-string columns missing cleaning actions
-    missing_actions = []
-    for col, cat in file_categories.items():
-        if cat in ['int', 'float', 'date']:
-            # Look for cleaning actions with any matching filename variant
-            found = False
-            for action_key in cleaning_actions.keys():
-                if action_key == csv_filename or action_key == cat_key or action_key.replace("sample_", "") == csv_filename.replace("sample_", ""):
-                    if col in cleaning_actions[action_key]:
-                        found = True
-                        break
-            if not found:
-                missing_actions.append(f"{col} ({cat})")
+    missing_actions = [f"{col} ({cat})" for col, cat in categories[cat_key].items()
+                       if cat in ['int', 'float', 'date'] and col not in file_actions]
     
     if missing_actions:
         print(f"❌ ERROR: Missing cleaning actions for {csv_filename}:")
@@ -71,258 +95,612 @@ def validate_configs(categories, cleaning_actions, csv_filename):
     
     return True
 
-# --- CLEANING FUNCTIONS ---
-def clean_numeric_string(series):
-    """Remove currency symbols, commas, parentheses from string series"""
-    return series.astype(str).str.replace(r'[$,\s)]', '', regex=True).str.replace('(', '-', regex=False)
+# --- GLOBAL STATISTICS (PASS 1) ---
+class ColumnStats:
+    """
+    Streaming accumulator for one numeric column.
+    Exact count/mean/variance (Welford, merged chunk-wise) plus an approximate
+    median from a merging t-digest, so memory stays constant per column.
+    """
+    def __init__(self, compression=QUANTILE_COMPRESSION):
+        self.compression = compression
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.centroids = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        """Fold a batch of non-NaN float values into the running stats"""
+        n_b = len(values)
+        if n_b == 0:
+            return
+        
+        # Welford / Chan batch merge
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / n
+        self.count = n
+        
+        # t-digest merge: sort old centroids + new points, regroup on the k1 scale
+        means = np.concatenate([self.centroids, values])
+        weights = np.concatenate([self.weights, np.ones(n_b)])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        bins = np.unique(np.floor(k - k[0]).astype(np.int64), return_inverse=True)[1]
+        self.weights = np.bincount(bins, weights)
+        self.centroids = np.bincount(bins, weights * means) / self.weights
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        ranks = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.count, ranks, self.centroids))
+
+    def freeze(self):
+        """Return the final stats used by every chunk in pass 2"""
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count > 0 else np.nan,
+            'std': np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan,
+            'median': self.quantile(0.5)
+        }
 
-def apply_column_cleaning(df, col_name, actions, category):
+def read_numeric_batches(csv_path, columns):
+    """Stream record batches of the given columns as text with pyarrow (unneeded columns are skipped unconverted)"""
+    convert_options = pacsv.ConvertOptions(
+        include_columns=columns,
+        column_types={col: pa.string() for col in columns},
+        strings_can_be_null=True
+    )
+    parse_options = pacsv.ParseOptions(newlines_in_values=True)
+    with open_raw(csv_path) as f, pacsv.open_csv(f, parse_options=parse_options, convert_options=convert_options) as reader:
+        yield from reader
+
+def compute_global_stats(csv_path, plan, memory_budget_mb=MEMORY_BUDGET_MB):
     """
-    Apply cleaning actions to a single column
-    Returns: (cleaned_df, stats_dict)
+    Pass 1: stream only the numeric columns being cleaned and gather whole-file stats.
+    Columns with mean/median fills also get fill stats from the values that survive their
+    outlier/negative rules (cleaning_kernel.fill_basis). Their parsed values are held while
+    they fit in EXACT_FILL_SHARE of memory_budget_mb, so fills are exact; past that a second
+    streaming pass gives an exact fill mean and a t-digest fill median.
+    Returns: {col: {'count', 'mean', 'std', 'median'}}, plus 'fill_mean', 'fill_median'
+    and 'fill_exact' for columns with fills
     """
-    stats = {
-        'rows_removed': 0,
-        'values_filled': 0,
-        'values_capped': 0,
-        'values_converted': 0,
-        'parsing_errors': 0,
-        'outliers': 0,
-        'negatives': 0,
-        'missing': 0
-    }
+    numeric_cols = plan.numeric_columns
+    if not numeric_cols:
+        return {}
     
-    original_len = len(df)
-    series = df[col_name].copy()
+    accumulators = {col: ColumnStats() for col in numeric_cols}
+    fill_actions = {step.column: step.actions for step in plan.steps
+                    if step.column in accumulators and uses_fill_stats(step.actions)}
+    held = {col: [] for col in fill_actions}
+    held_limit, held_bytes = memory_budget_mb * 1024 * 1024 * EXACT_FILL_SHARE, 0
+    for batch in read_numeric_batches(csv_path, numeric_cols):
+        for col, acc in accumulators.items():
+            values = parse_numeric(batch.column(col))
+            values = values[~np.isnan(values)]
+            acc.update(values)
+            if held is not None and col in held:
+                held[col].append(values)
+                held_bytes += values.nbytes
+        if held is not None and held_bytes > held_limit:
+            held = None  # Too big to hold: fill stats need their own pass
+    global_stats = {col: acc.freeze() for col, acc in accumulators.items()}
     
-    # === DATE COLUMN ===
-    if category == 'date':
-        # Parse dates
-        date_series = pd.to_datetime(series, errors='coerce')
-        
-        # Track issues
-        parsing_errors_mask = date_series.isna() & series.notna()
-        missing_mask = series.isna()
-        stats['parsing_errors'] = parsing_errors_mask.sum()
-        stats['missing'] = missing_mask.sum()
-        
-        # Handle parsing errors
-        parse_action = actions.get('parsing_errors', 'keep')
-        if parse_action == 'remove':
-            df = df[~parsing_errors_mask]
-            stats['rows_removed'] += parsing_errors_mask.sum()
-            date_series = date_series[~parsing_errors_mask]
-        elif parse_action == 'interpolate':
-            date_series = date_series.interpolate(method='linear')
-            stats['values_filled'] += parsing_errors_mask.sum()
-        
-        # Handle outliers (date range)
-        if actions.get('min_date') and actions.get('max_date'):
-            min_dt = pd.Timestamp(actions['min_date'])
-            max_dt = pd.Timestamp(actions['max_date'])
-            outliers_mask = (date_series < min_dt) | (date_series > max_dt)
-            stats['outliers'] = outliers_mask.sum()
-            
-            outlier_action = actions.get('outliers', 'keep')
-            if outlier_action == 'remove':
-                df = df[~outliers_mask]
-                stats['rows_removed'] += outliers_mask.sum()
-                date_series = date_series[~outliers_mask]
-            elif outlier_action == 'interpolate':
-                date_series[outliers_mask] = pd.NaT
-                date_series = date_series.interpolate(method='linear')
-                stats['values_filled'] += outliers_mask.sum()
-        
-        # Handle missing
-        miss_action = actions.get('missing', 'keep')
-        if miss_action == 'remove':
-            missing_now = date_series.isna()
-            df = df[~missing_now]
-            stats['rows_removed'] += missing_now.sum()
-            date_series = date_series[~missing_now]
-        elif miss_action == 'interpolate':
-            before = date_series.isna().sum()
-            date_series = date_series.interpolate(method='linear')
-            stats['values_filled'] += before - date_series.isna().sum()
-        
-        df[col_name] = date_series
-        return df, stats
+    if held is not None:
+        for col, actions in fill_actions.items():
+            values = np.concatenate(held[col]) if held[col] else np.empty(0)
+            global_stats[col].update(fill_stats(fill_basis(values, actions, global_stats[col])), fill_exact=True)
+    elif fill_actions:
+        survivors = {col: ColumnStats() for col in fill_actions}
+        for batch in read_numeric_batches(csv_path, list(fill_actions)):
+            for col, acc in survivors.items():
+                acc.update(fill_basis(parse_numeric(batch.column(col)), fill_actions[col], global_stats[col]))
+        for col, acc in survivors.items():
+            frozen = acc.freeze()
+            global_stats[col].update(fill_mean=frozen['mean'], fill_median=frozen['median'], fill_exact=False)
+    return global_stats
+
+# --- CLEANING FUNCTIONS ---
+def clean_columns(chunk, plan, timer=None):
+    """
+    Run the plan's column steps (cleaning_kernel, shared with the 03 preview).
+    All columns share one keep-mask: values are replaced column by column and removed
+    rows are dropped once at the end, so the chunk is copied once instead of per action.
+    Numeric fills and outlier bounds come from the whole-file stats bound to the plan
+    after pass 1, so every chunk uses the same values. Int columns come back as nullable Int64.
+    timer: optional PhaseTimer that gets one trace event per column
+    Returns: (cleaned_chunk, {col: stats_dict}, {col: seam}) -- stats include the column's 'seconds';
+    seams (interpolated date columns only) give the rows at the chunk edges still waiting
+    for a neighbouring chunk's dates, as positions in the cleaned chunk
+    """
+    keep = np.ones(len(chunk), dtype=bool)
+    col_stats = {}
+    seams = {}
+    for step in plan.steps:
+        start = time.perf_counter()
+        values, stats, seam = step.run(chunk.iloc[:, step.position], keep)
+        chunk[step.column] = as_int_values(values) if step.category == 'int' else values
+        stats['seconds'] = time.perf_counter() - start
+        col_stats[step.column] = stats
+        if seam is not None:
+            seams[step.column] = seam
+        if timer:
+            timer.trace(step.column, start, stats['seconds'], category=step.category)
     
-    # === NUMERIC COLUMN (int/float) ===
+    if not keep.all():
+        chunk = chunk[keep]
+    
+    # Rows removed by later columns still count as gap positions, but only survivors are filled
+    output_rows = np.cumsum(keep) - 1
+    for col, seam in seams.items():
+        for edge in ['head', 'tail']:
+            rows, target = seam.pop(f'{edge}_rows'), seam.pop(f'{edge}_target')
+            survivors = target & keep[rows]
+            seam[edge] = (len(rows), int(target.sum()), output_rows[rows[survivors]], np.flatnonzero(survivors))
+    return chunk, col_stats, seams
+
+def split_at_seams(chunk, seams, include_header):
+    """
+    Cut a chunk with open interpolation gaps into head and tail DataFrames, which
+    the writer fills once the neighbouring chunks arrive, and a middle it can
+    encode right away. A column with no valid date in the chunk holds the whole chunk.
+    Seam positions are rebased onto the frame holding them.
+    Returns: (head, middle, tail) -- head/tail may be None, middle is None or a DataFrame
+    """
+    n_rows = len(chunk)
+    if any(seam['first'] is None for seam in seams.values()):
+        head_end = tail_start = n_rows
     else:
-        # Convert to numeric
-        clean_str = clean_numeric_string(series)
-        numeric_series = pd.to_numeric(clean_str, errors='coerce')
-        
-        # Track issues
-        parsing_errors_mask = numeric_series.isna() & series.notna()
-        missing_mask = series.isna()
-        stats['parsing_errors'] = parsing_errors_mask.sum()
-        stats['missing'] = missing_mask.sum()
+        head_end = max((seam['head'][2].max() + 1 for seam in seams.values() if len(seam['head'][2])), default=0)
+        tail_start = min((seam['tail'][2].min() for seam in seams.values() if len(seam['tail'][2])), default=n_rows)
+        if head_end > tail_start:
+            head_end = tail_start = n_rows
+    
+    head = chunk.iloc[:head_end].copy() if head_end else None
+    tail = chunk.iloc[tail_start:].copy() if tail_start < n_rows else None
+    # The first chunk's middle carries the CSV header unless a head frame goes first
+    has_middle = tail_start > head_end or (include_header and head is None)
+    middle = chunk.iloc[head_end:tail_start] if has_middle else None
+    
+    for seam in seams.values():
+        gap_rows, targets, positions, gap_index = seam['head']
+        seam['head'] = (gap_rows, targets, head, positions, gap_index)
+        gap_rows, targets, positions, gap_index = seam['tail']
+        if tail is not None:
+            seam['tail'] = (gap_rows, targets, tail, positions - tail_start, gap_index)
+        else:
+            seam['tail'] = (gap_rows, targets, head, positions, gap_index)
+    return head, middle, tail
+
+# --- OUTPUT WRITERS ---
+def build_arrow_schema(output_columns, file_categories, output_format):
+    """Arrow schema for the cleaned output, typed from 02_Data_Categories.json"""
+    # Arrow IPC files allow one dictionary per field, but each chunk builds its own
+    use_dictionary = STRINGS_AS_DICTIONARY and output_format == 'parquet'
+    string_type = pa.dictionary(pa.int32(), pa.string()) if use_dictionary else pa.string()
+    types = {'int': pa.int64(), 'float': pa.float64(), 'date': pa.timestamp('ns')}
+    return pa.schema([(col, types.get(file_categories.get(col), string_type)) for col in output_columns])
+
+def chunk_to_table(chunk, schema):
+    """Convert a cleaned chunk to an Arrow table matching the output schema"""
+    arrays = []
+    for field in schema:
+        col = chunk[field.name]
+        if pa.types.is_integer(field.type):
+            # Mean/median fills can be fractional; round (half to even, as as_int_values) so int columns stay int64
+            col = pd.to_numeric(col, errors='coerce').round()
+        elif pa.types.is_floating(field.type):
+            col = pd.to_numeric(col, errors='coerce')
+        elif pa.types.is_timestamp(field.type):
+            col = pd.to_datetime(col, errors='coerce', utc=True).dt.tz_localize(None)
+        else:
+            col = col.astype('string')
+        arrays.append(pa.array(col, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+class CsvOutput:
+    def __init__(self, output_path, schema, resume_at=None):
+        if resume_at is not None:
+            # Drop anything written after the last checkpoint, then append
+            os.truncate(output_path, resume_at)
+            self.file = open(output_path, 'a', encoding='utf-8', newline='')
+        else:
+            self.file = open_output(output_path, CSV_COMPRESSION, encoding='utf-8', newline='')
+        self.started = resume_at is not None
+
+    def write(self, text):
+        self.file.write(text)
+        self.started = True
+
+    def write_frame(self, chunk):
+        """Encode and write a cleaned DataFrame (the header goes with the first piece)"""
+        self.write(chunk.to_csv(index=False, header=not self.started, date_format=DATE_OUTPUT_FORMAT))
+
+    def sync(self):
+        """Flush to disk for a checkpoint. Returns: bytes written"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return os.fstat(self.file.fileno()).st_size
+
+    def close(self):
+        self.file.close()
+
+class ParquetOutput:
+    def __init__(self, output_path, schema):
+        self.schema = schema
+        self.writer = pq.ParquetWriter(output_path, schema, compression=PARQUET_COMPRESSION)
+
+    def write(self, table):
+        # One row group per chunk
+        if table.num_rows:
+            self.writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+
+    def write_frame(self, chunk):
+        self.write(chunk_to_table(chunk, self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class ArrowOutput:
+    def __init__(self, output_path, schema):
+        self.schema = schema
+        compression = None if ARROW_COMPRESSION == 'none' else ARROW_COMPRESSION
+        self.sink = pa.OSFile(str(output_path), 'wb')
+        self.writer = pa.ipc.new_file(self.sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def write(self, table):
+        if table.num_rows:
+            self.writer.write_table(table, max_chunksize=ROW_GROUP_SIZE)
+
+    def write_frame(self, chunk):
+        self.write(chunk_to_table(chunk, self.schema))
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+OUTPUT_WRITERS = {'csv': CsvOutput, 'parquet': ParquetOutput, 'arrow': ArrowOutput}
+
+# --- CHUNK PIPELINE ---
+def encode_chunk(chunk, schema, include_header):
+    """CSV text, or an Arrow table when schema is given"""
+    if schema is not None:
+        return chunk_to_table(chunk, schema)
+    return chunk.to_csv(index=False, header=include_header, date_format=DATE_OUTPUT_FORMAT)
+
+def clean_chunk(data, plan, include_header, schema=None, trace=False):
+    """
+    Parse and clean one record-aligned byte range.
+    Runs in a worker process and encodes the result (CSV text, or an Arrow table
+    when schema is given) so the writer only has to append it.
+    Returns: (payload, input_rows, output_rows, {'columns': {col: stats}, 'phases': {phase: {'wall', 'cpu'}}, 'events': [...],
+              'bytes': input_bytes, 'rss_start_mb' / 'rss_mb': RSS of the cleaning process before / with the chunk, 'pid'})
+    """
+    timer = PhaseTimer(trace)
+    rss_start_mb = current_rss_mb()
+    
+    # IGNORE columns are skipped by usecols
+    with timer.phase('read'):
+        chunk = pd.read_csv(io.BytesIO(data), **plan.read_options)
+    chunk_start_rows = len(chunk)
+    
+    # Clean numeric/date columns
+    with timer.phase('clean'):
+        chunk, col_stats, seams = clean_columns(chunk, plan, timer)
+    
+    with timer.phase('encode'):
+        if seams:
+            # Date gaps may run into the neighbouring chunks: the writer finishes the edges
+            head, middle, tail = split_at_seams(chunk, seams, include_header)
+            if middle is not None:
+                middle = encode_chunk(middle, schema, include_header and head is None)
+            payload = {'head': head, 'middle': middle, 'tail': tail, 'seams': seams}
+        else:
+            payload = encode_chunk(chunk, schema, include_header)
+    
+    metrics = {'columns': col_stats, 'phases': timer.phases, 'events': timer.events or [], 'bytes': len(data),
+               'rss_start_mb': rss_start_mb, 'rss_mb': current_rss_mb(), 'pid': os.getpid()}
+    return payload, chunk_start_rows, len(chunk), metrics
+
+def add_counts(total, counts):
+    """Add a flat dict of counters/seconds into a running total"""
+    for key, value in counts.items():
+        total[key] = total.get(key, 0) + value
+
+def merge_chunk_metrics(total, metrics):
+    """Fold one chunk's per-column stats, phase timings and trace events into the file totals"""
+    for col, stats in metrics['columns'].items():
+        add_counts(total['columns'].setdefault(col, {}), stats)
+    merge_phases(total['phases'], metrics['phases'])
+    total['events'].extend(metrics['events'])
+
+def write_chunks(results, output, total_bytes, trace=False, journal=None, resumed=None, sizer=None):
+    """
+    Ordered writer: append chunk results to the output in input order.
+    results yields (payload, input_rows, output_rows, metrics) in chunk order.
+    total_bytes: input file size, for progress (chunk sizes come back in metrics['bytes']); None when unknown (compressed input).
+    Chunks with interpolated date gaps at their edges (see split_at_seams) are
+    stitched here: edge rows wait until the next valid date arrives.
+    journal: optional CheckpointJournal, committed whenever nothing is held back.
+    resumed: checkpoint to continue from (counters and open gaps of the previous run).
+    sizer: optional ChunkSizer, told each chunk's RSS so later chunks are resized.
+    Returns: (total_input_rows, total_output_rows, metrics summed over chunks)
+    """
+    resumed = resumed or {}
+    total_rows_input = resumed.get('rows_input', 0)
+    total_rows_output = resumed.get('rows_output', 0)
+    totals = {'columns': resumed.get('columns', {}), 'phases': {}, 'events': []}
+    bytes_done = resumed.get('bytes_done', 0)
+    stitchers = {}
+    for col, state in resumed.get('stitchers', {}).items():
+        stitchers[col] = SeamStitcher(col)
+        stitchers[col].restore(state)
+    held = deque()  # Pieces waiting behind an open gap, in output order
+    for chunk_num, (payload, chunk_start_rows, chunk_rows, metrics) in enumerate(results, resumed.get('chunks', 0) + 1):
+        timer = PhaseTimer(trace)
+        with timer.phase('write', chunk=chunk_num):
+            if isinstance(payload, dict):
+                held.extend(piece for piece in (payload['head'], payload['middle'], payload['tail']) if piece is not None)
+                for col, seam in payload['seams'].items():
+                    stitcher = stitchers.setdefault(col, SeamStitcher(col))
+                    metrics['columns'][col]['values_filled'] += stitcher.add(seam)
+            else:
+                held.append(payload)
+            write_ready(held, stitchers, output)
+        merge_phases(metrics['phases'], timer.phases)
+        metrics['events'].extend(timer.events or [])
+        merge_chunk_metrics(totals, metrics)
+        total_rows_input += chunk_start_rows
+        total_rows_output += chunk_rows
         
-        # Handle parsing errors
-        parse_action = actions.get('parsing_errors', 'keep')
-        if parse_action == 'strip':
-            df[col_name] = numeric_series
-        elif parse_action == 'remove':
-            df = df[~parsing_errors_mask]
-            stats['rows_removed'] += parsing_errors_mask.sum()
-            numeric_series = numeric_series[~parsing_errors_mask]
-        elif parse_action == 'mean':
-            valid_values = numeric_series.dropna()
-            if len(valid_values) > 0:
-                fill_value = valid_values.mean()
-                numeric_series[parsing_errors_mask] = fill_value
-                stats['values_filled'] += parsing_errors_mask.sum()
-            df[col_name] = numeric_series
-        elif parse_action == 'median':
-            valid_values = numeric_series.dropna()
-            if len(valid_values) > 0:
-                fill_value = valid_values.median()
-                numeric_series[parsing_errors_mask] = fill_value
-                stats['values_filled'] += parsing_errors_mask.sum()
-            df[col_name] = numeric_series
+        bytes_done += metrics['bytes']
         
-        # Recalculate for outliers/negatives (work with current numeric_series)
-        if len(numeric_series) > 0:
-            # Handle outliers
-            outlier_threshold = actions.get('outlier_threshold', 3.0)
-            mean = numeric_series.mean()
-            std = numeric_series.std()
-            
-            if std > 0:
-                lower = mean - outlier_threshold * std
-                upper = mean + outlier_threshold * std
-                outliers_mask = (numeric_series > upper) | (numeric_series < lower)
-                stats['outliers'] = outliers_mask.sum()
-                
-                outlier_action = actions.get('outliers', 'keep')
-                if outlier_action == 'remove':
-                    df = df[~outliers_mask]
-                    stats['rows_removed'] += outliers_mask.sum()
-                    numeric_series = numeric_series[~outliers_mask]
-                elif outlier_action == 'mean':
-                    numeric_series[outliers_mask] = mean
-                    stats['values_filled'] += outliers_mask.sum()
-                elif outlier_action == 'median':
-                    numeric_series[outliers_mask] = numeric_series.median()
-                    stats['values_filled'] += outliers_mask.sum()
-                elif outlier_action == 'cap':
-                    numeric_series = numeric_series.clip(lower=lower, upper=upper)
-                    stats['values_capped'] += outliers_mask.sum()
-                
-                df[col_name] = numeric_series
-            
-            # Handle negatives
-            negatives_mask = numeric_series < 0
-            stats['negatives'] = negatives_mask.sum()
-            
-            neg_action = actions.get('negatives', 'keep')
-            if neg_action == 'remove':
-                df = df[~negatives_mask]
-                stats['rows_removed'] += negatives_mask.sum()
-                numeric_series = numeric_series[~negatives_mask]
-            elif neg_action == 'absolute':
-                numeric_series = numeric_series.abs()
-                stats['values_converted'] += negatives_mask.sum()
-            elif neg_action == 'mean':
-                if negatives_mask.any():
-                    numeric_series[negatives_mask] = numeric_series.mean()
-                    stats['values_filled'] += negatives_mask.sum()
-            elif neg_action == 'median':
-                if negatives_mask.any():
-                    numeric_series[negatives_mask] = numeric_series.median()
-                    stats['values_filled'] += negatives_mask.sum()
-            
-            df[col_name] = numeric_series
+        rows_removed = chunk_start_rows - chunk_rows
+        progress = f"{bytes_done / total_bytes * 100:.0f}% · " if total_bytes else ""
+        print(f"      Chunk {chunk_num}: {chunk_start_rows:,} → {chunk_rows:,} rows ({rows_removed:,} removed) "
+              f"[{progress}{bytes_done / (1024 * 1024):,.1f} MB]")
         
-        # Handle missing
-        miss_action = actions.get('missing', 'keep')
-        if miss_action == 'remove':
-            missing_now = numeric_series.isna()
-            df = df[~missing_now]
-            stats['rows_removed'] += missing_now.sum()
-        elif miss_action == 'mean':
-            before = numeric_series.isna().sum()
-            numeric_series = numeric_series.fillna(numeric_series.mean())
-            stats['values_filled'] += before - numeric_series.isna().sum()
-            df[col_name] = numeric_series
-        elif miss_action == 'median':
-            before = numeric_series.isna().sum()
-            numeric_series = numeric_series.fillna(numeric_series.median())
-            stats['values_filled'] += before - numeric_series.isna().sum()
-            df[col_name] = numeric_series
+        resized = sizer.observe(chunk_start_rows, metrics['pid'], metrics['rss_start_mb'], metrics['rss_mb']) if sizer else None
+        if resized:
+            rows, footprint = resized
+            print(f"      📏 Chunk size → {rows:,} rows (chunks used {footprint:,.0f} MB, budget {sizer.chunk_budget_mb:,.0f} MB per chunk)")
         
-        return df, stats
+        if journal and not held:
+            journal.commit(output, bytes_done, {
+                'chunks': chunk_num,
+                'rows_input': total_rows_input,
+                'rows_output': total_rows_output,
+                'bytes_done': bytes_done,
+                'columns': totals['columns'],
+                'stitchers': {col: stitcher.state() for col, stitcher in stitchers.items()}
+            })
+    
+    # End of file: rows after the last valid date take it
+    for col, stitcher in stitchers.items():
+        totals['columns'][col]['values_filled'] += stitcher.finish()
+    write_ready(held, stitchers, output)
+    
+    return total_rows_input, total_rows_output, totals
+
+def write_ready(held, stitchers, output):
+    """Write held pieces in order, stopping at the first frame an open gap still has rows in"""
+    while held:
+        piece = held[0]
+        if isinstance(piece, pd.DataFrame):
+            if any(stitcher.holds(piece) for stitcher in stitchers.values()):
+                return
+            output.write_frame(piece)
+        else:
+            output.write(piece)
+        held.popleft()
+
+def run_chunks_parallel(chunk_args, output, workers, total_bytes, trace=False, journal=None, resumed=None, sizer=None):
+    """
+    Clean chunks on a process pool while a single writer thread appends them in input order.
+    In-flight chunks are bounded so memory stays at ~2 chunks per worker.
+    """
+    pending = queue.Queue(maxsize=workers * 2)
+    outcome = {}
+    
+    def writer():
+        def results():
+            while True:
+                future = pending.get()
+                if future is None:
+                    return
+                yield future.result()
+        try:
+            outcome['totals'] = write_chunks(results(), output, total_bytes, trace, journal, resumed, sizer)
+        except Exception as e:
+            outcome['error'] = e
+            # Drain so the reader never blocks on a full queue
+            while pending.get() is not None:
+                pass
+    
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for args in chunk_args:
+                if 'error' in outcome:
+                    break
+                pending.put(pool.submit(clean_chunk, *args))
+            pending.put(None)
+            writer_thread.join()
+    finally:
+        if writer_thread.is_alive():
+            pending.put(None)
+            writer_thread.join()
+    
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['totals']
 
 # --- MAIN PROCESSING ---
-def process_csv(csv_path, categories, cleaning_actions):
-    """Process a single CSV file with chunked processing"""
-    csv_filename = csv_path.name
-    print(f"\n📄 Processing: {csv_filename}")
+def chunks_in_flight(chunk_workers):
+    """Chunks held in memory at once: one when serial; queued + running + being written when parallel"""
+    return 1 if chunk_workers <= 1 else chunk_workers * 2 + 2
+
+def plan_chunk_sizes(csv_path, plan, chunk_workers, memory_budget_mb):
+    """
+    Size pass 2 chunks for a memory budget (MB): parse the first PROBE_ROWS records to
+    estimate in-memory bytes per row (wide files get fewer rows per chunk).
+    Returns: ChunkSizer
+    """
+    with open_raw(csv_path) as f:
+        read_header(f)
+        _, data, _ = next(iter_record_chunks(f, PROBE_ROWS), (0, b"", 0))
+    probe = pd.read_csv(io.BytesIO(data), **plan.read_options) if data.strip() else pd.DataFrame()
+    row_bytes = estimate_row_bytes(len(data), int(probe.memory_usage(deep=True).sum()), len(probe))
+    del probe
+    
+    sizer = ChunkSizer(memory_budget_mb, chunks_in_flight(chunk_workers), row_bytes)
+    print(f"   📏 ~{row_bytes / 1024:,.1f} KB per row in memory ({len(plan.usecols)} columns): "
+          f"{sizer.rows:,} rows per chunk for a {memory_budget_mb:,.0f} MB budget "
+          f"over {chunks_in_flight(chunk_workers)} chunk(s) in flight")
+    return sizer
+
+def resolve_date_formats(csv_path, plan):
+    """Sniff a format from the first chunk for date columns configured before formats were saved"""
+    missing = [step for step in plan.steps if step.category == 'date' and not step.actions.get('date_format')]
+    if not missing:
+        return
+    
+    with open_raw(csv_path) as f:
+        head = pd.read_csv(f, usecols=[step.column for step in missing], dtype=str, nrows=DATE_SNIFF_ROWS)
+    for step in missing:
+        step.actions['date_format'] = sniff_date_format(head[step.column])
+        print(f"   📅 {step.column}: detected date format {step.actions['date_format'] or 'none (per-value parsing)'}")
+
+def get_cleaning_plan(csv_path, categories, cleaning_actions):
+    """
+    Compile the file's cleaning plan, or reuse the cached one when neither the file
+    nor its config entries changed (skips compiling the plan and re-sniffing date formats).
+    """
+    with open_raw(csv_path) as f:
+        columns = list(pd.read_csv(io.BytesIO(read_header(f)), nrows=0).columns)
+    key = plan_key(csv_path, columns, categories, cleaning_actions, STRING_DTYPE)
+    
+    cached = load_cached_plan(csv_path, key)
+    if cached:
+        print(f"   ♻️  Using cached cleaning plan")
+        return cached
+    
+    plan = compile_plan(csv_path, columns, categories, cleaning_actions, STRING_DTYPE, key)
+    resolve_date_formats(csv_path, plan)
+    save_plan(plan, csv_path)
+    return plan
+
+def process_csv(csv_path, categories, cleaning_actions, chunk_workers=1, trace=False, resume=False,
+                memory_budget_mb=MEMORY_BUDGET_MB):
+    """
+    Process a single CSV file with chunked processing.
+    resume: continue from the last checkpoint. memory_budget_mb: memory this file's chunks may use.
+    """
+    csv_filename = csv_name(csv_path)  # Compressed files are configured under their .csv name
+    print(f"\n📄 Processing: {csv_path.name}")
+    file_start, file_cpu_start = time.perf_counter(), time.process_time()
+    timer = PhaseTimer(trace)  # Wall/CPU seconds per phase
     
     # Validate configs
     if not validate_configs(categories, cleaning_actions, csv_filename):
         return False, None
     
-    # Find matching category key
-    cat_key = None
-    for key in categories.keys():
-        if key == csv_filename or key.replace("sample_", "") == csv_filename.replace("sample_", ""):
-            cat_key = key
-            break
-    
-    file_categories = categories[cat_key]
+    # Resolve keys, columns and kernel steps once for the whole file
+    with timer.phase('plan', file=csv_filename):
+        plan = get_cleaning_plan(csv_path, categories, cleaning_actions)
     
-    # Find matching actions key
-    action_key = None
-    for key in cleaning_actions.keys():
-        if key == csv_filename or key == cat_key or key.replace("sample_", "") == csv_filename.replace("sample_", ""):
-            action_key = key
-            break
+    print(f"   🗑️  Deleting {len(plan.cols_to_delete)} IGNORE columns")
+    print(f"   🧹 Cleaning {len(plan.cols_to_clean)} numeric/date columns")
+    print(f"   📋 Copying {len(plan.cols_to_copy)} string columns as-is")
     
-    file_actions = cleaning_actions.get(action_key, {}) if action_key else {}
-    
-    # Determine which columns to keep/delete
-    cols_to_delete = [col for col, cat in file_categories.items() if cat == 'IGNORE']
-    cols_to_clean = {col: cat for col, cat in file_categories.items() if cat in ['int', 'float', 'date']}
-    cols_to_copy = [col for col, cat in file_categories.items() if cat == 'string']
+    # Rows are counted by the main pass; progress is reported in bytes
+    file_size = csv_path.stat().st_size
+    compression = compression_of(csv_path)
+    if compression:
+        # Decompressed size is unknown up front: progress shows MB read without a percentage
+        print(f"   📦 Size: {file_size / (1024 * 1024):,.1f} MB ({compression}, streamed)")
+    else:
+        print(f"   📦 Size: {file_size / (1024 * 1024):,.1f} MB")
     
-    print(f"   🗑️  Deleting {len(cols_to_delete)} IGNORE columns")
-    print(f"   🧹 Cleaning {len(cols_to_clean)} numeric/date columns")
-    print(f"   📋 Copying {len(cols_to_copy)} string columns as-is")
+    output_suffix = OUTPUT_SUFFIXES[OUTPUT_FORMAT] + (compressed_suffix(CSV_COMPRESSION) if OUTPUT_FORMAT == 'csv' else "")
+    output_path = CLEANED_DATA / f"Cleaned_{Path(csv_filename).stem}{output_suffix}"
     
-    # Count total rows
-    print(f"   📊 Counting rows...")
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        total_rows = sum(1 for _ in f) - 1  # -1 for header
-    print(f"   📈 Total rows: {total_rows:,}")
+    # Checkpoints (uncompressed CSV output only: other outputs can't be cut back and appended to)
+    checkpointing = OUTPUT_FORMAT == 'csv' and CSV_COMPRESSION is None
+    journal_path = checkpoint_path(output_path)
+    resumed = None
+    if checkpointing and resume:
+        resumed = load_checkpoint(journal_path, plan.key)
+        if resumed and (not output_path.exists() or output_path.stat().st_size < resumed['output_offset']):
+            resumed = None  # Output is missing or shorter than the checkpoint says
+        if not resumed:
+            print(f"   ℹ️  No usable checkpoint, starting over")
+    elif resume:
+        print(f"   ⚠️  --resume needs uncompressed CSV output, starting over")
+    if not resumed:
+        journal_path.unlink(missing_ok=True)
     
-    # Process in chunks
-    output_path = CLEANED_DATA / f"Cleaned_{csv_filename}"
-    first_chunk = True
-    total_rows_output = 0
+    if resumed:
+        # The checkpoint carries the whole-file stats, so pass 1 is skipped
+        global_stats = resumed['global_stats']
+        print(f"   ⏯️  Resuming after chunk {resumed['chunks']:,} "
+              f"({resumed['bytes_done'] / (1024 * 1024):,.1f} MB read, {resumed['rows_output']:,} rows written)")
+    else:
+        # Pass 1: whole-file stats so every chunk shares the same bounds and fill values
+        print(f"   📐 Pass 1: gathering whole-file stats...")
+        with timer.phase('pass1', file=csv_filename):
+            global_stats = compute_global_stats(csv_path, plan, memory_budget_mb)
+        for col, col_stats in global_stats.items():
+            fills = ""
+            if 'fill_mean' in col_stats:
+                median_sign = "=" if col_stats['fill_exact'] else "≈"
+                fills = f" | fills: mean={col_stats['fill_mean']:.4g} median{median_sign}{col_stats['fill_median']:.4g}"
+            print(f"      {col}: n={col_stats['count']:,} mean={col_stats['mean']:.4g} std={col_stats['std']:.4g}{fills}")
+    plan.bind_stats(global_stats)
     
-    print(f"   ⚡ Processing in chunks of {CHUNK_SIZE:,}...")
+    # Pass 2: split into record-aligned byte ranges, clean, write in input order
+    sizer = plan_chunk_sizes(csv_path, plan, chunk_workers, memory_budget_mb)
+    if chunk_workers > 1:
+        print(f"   ⚡ Pass 2: processing in chunks of {sizer.rows:,} on {chunk_workers} workers...")
+    else:
+        print(f"   ⚡ Pass 2: processing in chunks of {sizer.rows:,}...")
     
-    for chunk_num, chunk in enumerate(pd.read_csv(csv_path, chunksize=CHUNK_SIZE), 1):
-        chunk_start_rows = len(chunk)
-        
-        # Delete IGNORE columns
-        chunk = chunk.drop(columns=cols_to_delete, errors='ignore')
-        
-        # Clean numeric/date columns
-        for col, cat in cols_to_clean.items():
-            if col in chunk.columns and col in file_actions:
-                chunk, stats = apply_column_cleaning(chunk, col, file_actions[col], cat)
+    with timer.phase('pass2', file=csv_filename), open_raw(csv_path) as f:
+        read_header(f)
+        journal = CheckpointJournal(journal_path, plan.key, global_stats, f.tell()) if checkpointing else None
+        if resumed:
+            f.seek(resumed['input_offset'])  # Compressed input: decompressed and skipped
+        progress_bytes = None if compression else file_size
+        schema = build_arrow_schema(plan.usecols, categories[plan.categories_key], OUTPUT_FORMAT) if OUTPUT_FORMAT != 'csv' else None
+        chunk_args = (
+            (data, plan, chunk_num == 0 and not resumed, schema, trace)
+            for chunk_num, (offset, data, records) in enumerate(iter_record_chunks(f, sizer))
+        )
         
-        # Write chunk
-        chunk.to_csv(output_path, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
-        first_chunk = False
-        total_rows_output += len(chunk)
-        
-        rows_removed = chunk_start_rows - len(chunk)
-        print(f"      Chunk {chunk_num}: {chunk_start_rows:,} → {len(chunk):,} rows ({rows_removed:,} removed)")
+        if resumed:
+            output = CsvOutput(output_path, schema, resume_at=resumed['output_offset'])
+        else:
+            output = OUTPUT_WRITERS[OUTPUT_FORMAT](output_path, schema)
+        try:
+            if chunk_workers > 1:
+                total_rows, total_rows_output, metrics = run_chunks_parallel(chunk_args, output, chunk_workers, progress_bytes, trace, journal, resumed, sizer)
+            else:
+                total_rows, total_rows_output, metrics = write_chunks((clean_chunk(*args) for args in chunk_args), output, progress_bytes, trace, journal, resumed, sizer)
+        finally:
+            output.close()
+    if journal:
+        journal.clear()
+    
+    wall = time.perf_counter() - file_start
+    timer.phases['total'] = {'wall': wall, 'cpu': time.process_time() - file_cpu_start}
     
     print(f"   ✅ Output: {total_rows_output:,} rows ({total_rows - total_rows_output:,} removed total)")
     print(f"   💾 Saved to: {output_path.name}")
@@ -333,28 +711,100 @@ def process_csv(csv_path, categories, cleaning_actions):
         'input_rows': total_rows,
         'output_rows': total_rows_output,
         'rows_removed': total_rows - total_rows_output,
-        'columns_deleted': len(cols_to_delete),
-        'columns_cleaned': len(cols_to_clean),
-        'columns_copied': len(cols_to_copy),
-        'output_file': output_path.name
+        'columns_deleted': len(plan.cols_to_delete),
+        'columns_cleaned': len(plan.cols_to_clean),
+        'columns_copied': len(plan.cols_to_copy),
+        'output_file': output_path.name,
+        'memory_budget_mb': memory_budget_mb,
+        'chunk_sizes': sizer.sizes,
+        'timings': timer.phases,
+        # Summed over chunks (worker time when chunks run in parallel)
+        'chunk_timings': metrics['phases'],
+        'columns': {step.column: {'category': step.category, **metrics['columns'].get(step.column, {})}
+                    for step in plan.steps},
+        'rows_per_second': total_rows / wall if wall > 0 else 0.0,
+        'mb_per_second': file_size / (1024 * 1024) / wall if wall > 0 else 0.0,
+        'trace_events': (timer.events or []) + metrics['events']
     }
     
     return True, summary
 
+def process_csv_captured(csv_path, categories, cleaning_actions, trace=False, resume=False, memory_budget_mb=MEMORY_BUDGET_MB):
+    """Run process_csv in a worker process, buffering its console output so files don't interleave"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        success, summary = process_csv(csv_path, categories, cleaning_actions, trace=trace, resume=resume,
+                                       memory_budget_mb=memory_budget_mb)
+    return success, summary, buffer.getvalue()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply 02_Data_Categories.json + 04_Data_Cleaning_actions.json to Raw_Data")
+    parser.add_argument(
+        '--profile', nargs='?', const='trace', choices=['trace', 'pstats'],
+        help="Report wall/CPU time per phase, throughput and peak memory. "
+             "'trace' (default) also writes a Chrome trace; 'pstats' runs on one process under cProfile and saves the stats"
+    )
+    parser.add_argument(
+        '--rebuild', action='store_true',
+        help="Clean every file, even those unchanged since the last run"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="Continue each file from its last checkpoint instead of starting over (CSV output)"
+    )
+    return parser.parse_args()
+
+def print_profile(summaries):
+    """Per-file phase timings, throughput and peak memory"""
+    print("\n" + "=" * 80)
+    print("⏱️  PROFILE")
+    print("=" * 80)
+    for s in summaries:
+        print(f"\n📄 {s['filename']}: {s['rows_per_second']:,.0f} rows/s, {s['mb_per_second']:.1f} MB/s")
+        for phase, seconds in s['timings'].items():
+            print(f"   {phase:<10} wall {seconds['wall']:>8.3f}s   cpu {seconds['cpu']:>8.3f}s")
+        print(f"   Chunk phases (summed over chunks):")
+        for phase, seconds in s['chunk_timings'].items():
+            print(f"   {phase:<10} wall {seconds['wall']:>8.3f}s   cpu {seconds['cpu']:>8.3f}s")
+        slowest = sorted(s['columns'].items(), key=lambda item: item[1].get('seconds', 0), reverse=True)[:5]
+        if slowest:
+            print(f"   Slowest columns: " + ", ".join(f"{col} {stats.get('seconds', 0):.3f}s" for col, stats in slowest))
+    
+    peak = peak_rss_mb()
+    if peak:
+        print(f"\n🧠 Peak RSS: {peak['self']:,.0f} MB (main), {peak['children']:,.0f} MB (largest worker)")
+
+def clean_build_key(csv_path, categories, cleaning_actions):
+    """Everything a file's cleaned output depends on: raw data, its config entries and output settings"""
+    cat_key = resolve_config_key(categories, csv_name(csv_path))
+    action_key = resolve_config_key(cleaning_actions, csv_name(csv_path), cat_key)
+    return build_key(csv_path, categories.get(cat_key), cleaning_actions.get(action_key),
+                     OUTPUT_FORMAT, PARQUET_COMPRESSION, ARROW_COMPRESSION, CSV_COMPRESSION, STRINGS_AS_DICTIONARY, STRING_DTYPE)
+
 def main():
+    args = parse_args()
     print("=" * 60)
     print("🧹 DATA CLEANING - APPLY SCRIPT")
     print("=" * 60)
     print(f"📂 Input:  {RAW_DATA}")
     print(f"📂 Output: {CLEANED_DATA}")
     print(f"⚙️  Config: {CATEGORIES_FILE.name} + {CLEANING_FILE.name}\n")
+    run_start = time.perf_counter()
     
     # Load configs
     categories = load_json(CATEGORIES_FILE)
     cleaning_actions = load_json(CLEANING_FILE)
     
     # Find CSV files
-    csv_files = sorted(list(RAW_DATA.glob("*.csv")))
+    csv_files = find_csv_files(RAW_DATA)  # .csv plus .csv.gz / .csv.bz2 / .csv.zst
+    
+    # data.csv and data.csv.gz would both write Cleaned_data.csv (and share config entries)
+    collisions = name_collisions(csv_files)
+    if collisions:
+        for name, paths in collisions.items():
+            print(f"❌ ERROR: {', '.join(path.name for path in paths)} would all be cleaned as {name} (same output file)")
+        print("   Keep one copy of each file in Raw_Data")
+        sys.exit(1)
     
     if not csv_files:
         print("❌ No CSV files found in Raw_Data!")
@@ -362,12 +812,60 @@ def main():
     
     print(f"📊 Found {len(csv_files)} CSV file(s)\n")
     
+    # Reuse outputs of files whose inputs haven't changed since they were last cleaned
+    build_cache = BuildCache(BUILD_CACHE_FILE, 'clean')
+    build_keys = {csv_file: clean_build_key(csv_file, categories, cleaning_actions) for csv_file in csv_files}
+    results = {}
+    for csv_file in csv_files:
+        cached = None if args.rebuild else build_cache.lookup(csv_file.name, build_keys[csv_file])
+        if cached and (CLEANED_DATA / cached['output_file']).exists():
+            print(f"♻️  Unchanged since last run: {csv_file.name} (keeping {cached['output_file']})")
+            results[csv_file] = (True, {**cached, 'reused': True, 'trace_events': []})
+    to_clean = [csv_file for csv_file in csv_files if csv_file not in results]
+    
     # Process each file and collect summaries
+    # (parallel files take priority; chunk-level parallelism is used when files run one at a time)
     summaries = []
+    workers = min(MAX_WORKERS, len(to_clean))
+    chunk_workers = CHUNK_WORKERS
+    trace = args.profile == 'trace'
+    profiler = None
+    if args.profile == 'pstats':
+        # cProfile only sees its own process, so keep all the work in it
+        print("🔬 Profiling with cProfile (files and chunks run on one process)")
+        workers = chunk_workers = 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    if workers > 1:
+        # Files cleaned at the same time share the memory budget
+        file_budget_mb = MEMORY_BUDGET_MB / workers
+        print(f"🚀 Cleaning with {workers} parallel workers ({file_budget_mb:,.0f} MB memory budget each)")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process_csv_captured, csv_file, categories, cleaning_actions, trace, args.resume,
+                                   file_budget_mb): csv_file
+                       for csv_file in to_clean}
+            for future in as_completed(futures):
+                success, summary, log = future.result()
+                print(log, end='')
+                results[futures[future]] = (success, summary)
+    else:
+        for csv_file in to_clean:
+            results[csv_file] = process_csv(csv_file, categories, cleaning_actions, chunk_workers, trace, args.resume,
+                                            MEMORY_BUDGET_MB)
+    
+    if profiler:
+        profiler.disable()
+    
+    # Keep input order so the report matches a sequential run
     for csv_file in csv_files:
-        success, summary = process_csv(csv_file, categories, cleaning_actions)
+        success, summary = results[csv_file]
         if success and summary:
             summaries.append(summary)
+            if not summary.get('reused'):
+                build_cache.record(csv_file.name, build_keys[csv_file],
+                                   {key: value for key, value in summary.items() if key != 'trace_events'})
+    build_cache.save()
     
     # Print final summary report
     print("\n" + "=" * 80)
@@ -390,7 +888,8 @@ def main():
             
             cols_summary = f"{s['columns_cleaned']}c/{s['columns_copied']}s"
             
-            print(f"{s['output_file']:<50} {s['input_rows']:>11,} {s['output_rows']:>11,} {s['rows_removed']:>9,} {cols_summary:>6}")
+            name = s['output_file'] + (" (reused)" if s.get('reused') else "")
+            print(f"{name:<50} {s['input_rows']:>11,} {s['output_rows']:>11,} {s['rows_removed']:>9,} {cols_summary:>6}")
         
         print("-" * 90)
         print(f"{'TOTAL':<50} {total_input:>11,} {total_output:>11,} {total_removed:>9,}")
@@ -398,6 +897,7 @@ def main():
         # Additional stats
         print(f"\n📈 Statistics:")
         print(f"   • Files processed: {len(summaries)}/{len(csv_files)}")
+        print(f"   • Files reused (unchanged): {sum(1 for s in summaries if s.get('reused'))}")
         print(f"   • Total rows processed: {total_input:,}")
         print(f"   • Total rows output: {total_output:,}")
         print(f"   • Total rows removed: {total_removed:,} ({total_removed/total_input*100:.1f}%)")
@@ -407,6 +907,19 @@ def main():
         
         # Generate markdown report
         generate_cleaning_report(summaries, categories, cleaning_actions, total_input, total_output, total_removed)
+        write_run_manifest(summaries, total_input, total_output, total_removed, time.perf_counter() - run_start)
+        
+        if args.profile:
+            print_profile(summaries)
+        if trace:
+            trace_path = CLEANED_DATA / "00_Cleaning_Trace.json"
+            write_chrome_trace([event for s in summaries for event in s['trace_events']], trace_path)
+            print(f"   📄 Chrome trace saved: {trace_path.name} (open in chrome://tracing or ui.perfetto.dev)")
+        if profiler:
+            stats_path = CLEANED_DATA / "00_Cleaning_Profile.pstats"
+            profiler.dump_stats(stats_path)
+            print(f"   📄 cProfile stats saved: {stats_path.name} (python -m pstats {stats_path.name})\n")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
         
     else:
         print("\n❌ No files were successfully processed")
@@ -429,13 +942,15 @@ def generate_cleaning_report(summaries, categories, cleaning_actions, total_inpu
     
     for s in summaries:
         pct_removed = (s['rows_removed'] / s['input_rows'] * 100) if s['input_rows'] > 0 else 0
-        lines.append(f"| {s['output_file']} | {s['input_rows']:,} | {s['output_rows']:,} | {s['rows_removed']:,} | {pct_removed:.1f}% |")
+        name = s['output_file'] + (" ♻️ reused" if s.get('reused') else "")
+        lines.append(f"| {name} | {s['input_rows']:,} | {s['output_rows']:,} | {s['rows_removed']:,} | {pct_removed:.1f}% |")
     
     total_pct = (total_removed / total_input * 100) if total_input > 0 else 0
     lines.extend([
         f"| **TOTAL** | **{total_input:,}** | **{total_output:,}** | **{total_removed:,}** | **{total_pct:.1f}%** |\n",
         "## Overall Statistics\n",
         f"- **Files Processed:** {len(summaries)}",
+        f"- **Files Reused (unchanged since last run):** {sum(1 for s in summaries if s.get('reused'))}",
         f"- **Total Input Rows:** {total_input:,}",
         f"- **Total Output Rows:** {total_output:,}",
         f"- **Total Rows Removed:** {total_removed:,}",
@@ -448,25 +963,13 @@ def generate_cleaning_report(summaries, categories, cleaning_actions, total_inpu
     for s in summaries:
         original_name = s['filename']
         
-        # Find category key
-        cat_key = None
-        for key in categories.keys():
-            if key == original_name or key.replace("sample_", "") == original_name.replace("sample_", ""):
-                cat_key = key
-                break
-        
+        cat_key = resolve_config_key(categories, original_name)
         if not cat_key:
             continue
             
         file_categories = categories[cat_key]
         
-        # Find action key
-        action_key = None
-        for key in cleaning_actions.keys():
-            if key == original_name or key == cat_key or key.replace("sample_", "") == original_name.replace("sample_", ""):
-                action_key = key
-                break
-        
+        action_key = resolve_config_key(cleaning_actions, original_name, cat_key)
         file_actions = cleaning_actions.get(action_key, {}) if action_key else {}
         
         lines.extend([
@@ -499,6 +1002,8 @@ def generate_cleaning_report(summaries, categories, cleaning_actions, total_inpu
                     
                     # Outliers
                     if cat == 'date':
+                        if actions.get('date_format'):
+                            lines.append(f"  - Date format: `{actions['date_format']}`")
                         if actions.get('min_date') or actions.get('max_date'):
                             lines.append(f"  - Date range: `{actions.get('min_date', 'N/A')}` to `{actions.get('max_date', 'N/A')}`")
                         if actions.get('outliers') != 'keep':
@@ -516,6 +1021,12 @@ def generate_cleaning_report(summaries, categories, cleaning_actions, total_inpu
                     if actions.get('missing') != 'keep':
                         lines.append(f"  - Missing: `{actions['missing']}`")
                     
+                    # What the actions found and changed
+                    counts = {key: value for key, value in s.get('columns', {}).get(col, {}).items()
+                              if key in STAT_KEYS and value}
+                    if counts:
+                        lines.append("  - Counts: " + ", ".join(f"{key.replace('_', ' ')} {value:,}" for key, value in counts.items()))
+                    
                     lines.append("")
         
         # Columns copied
@@ -532,5 +1043,42 @@ def generate_cleaning_report(summaries, categories, cleaning_actions, total_inpu
     report_path.write_text(report_content, encoding='utf-8')
     print(f"   📄 Cleaning report saved: {report_path.name}")
 
+def write_run_manifest(summaries, total_input, total_output, total_removed, run_seconds):
+    """Machine-readable companion to the report: per-file/column counters and timings"""
+    manifest_path = CLEANED_DATA / "00_Cleaning_Manifest.json"
+    
+    files = []
+    for s in summaries:
+        files.append({
+            'filename': s['filename'],
+            'output_file': s['output_file'],
+            'reused': bool(s.get('reused')),
+            'input_rows': s['input_rows'],
+            'output_rows': s['output_rows'],
+            'rows_removed': s['rows_removed'],
+            'rows_per_second': round(s['rows_per_second'], 1),
+            'mb_per_second': round(s['mb_per_second'], 3),
+            'memory_budget_mb': s.get('memory_budget_mb'),
+            'chunk_sizes': s.get('chunk_sizes', []),
+            'timings': {phase: {kind: round(value, 4) for kind, value in seconds.items()}
+                        for phase, seconds in s['timings'].items()},
+            'chunk_timings': {phase: {kind: round(value, 4) for kind, value in seconds.items()}
+                              for phase, seconds in s['chunk_timings'].items()},
+            'columns': {col: {key: round(value, 4) if key == 'seconds' else value for key, value in stats.items()}
+                        for col, stats in s['columns'].items()}
+        })
+    
+    manifest = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'output_format': OUTPUT_FORMAT,
+        'memory_budget_mb': MEMORY_BUDGET_MB,
+        'run_seconds': round(run_seconds, 4),
+        'peak_rss_mb': peak_rss_mb(),
+        'totals': {'input_rows': total_input, 'output_rows': total_output, 'rows_removed': total_removed},
+        'files': files
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    print(f"   📄 Run manifest saved: {manifest_path.name}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from pathlib import Path
+import sys
 import csv
 from datetime import datetime
 
@@ -6,6 +7,10 @@ from datetime import datetime
 SCRIPT_DIR = Path(__file__).parent
 OUTPUT_FILE = SCRIPT_DIR / "00_csv_dimensions_report.md"
 
+# Compressed CSVs (.csv.gz / .csv.bz2 / .csv.zst) are streamed with Working_data/raw_files.py
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+from raw_files import find_csv_files, open_raw_text
+
 def get_csv_info(csv_path):
     """Get row count, column count, and file size for a CSV"""
     info = {
@@ -17,7 +22,7 @@ def get_csv_info(csv_path):
     }
     
     # Count rows and get headers
-    with open(csv_path, 'r', encoding='utf-8', errors='replace') as f:
+    with open_raw_text(csv_path, encoding='utf-8', errors='replace') as f:
         reader = csv.reader(f)
         info['column_names'] = next(reader)  # Header row
         info['columns'] = len(info['column_names'])
@@ -29,7 +34,7 @@ def generate_report():
     """Generate markdown report for all CSVs in the directory"""
     
     # Find all CSV files
-    csv_files = sorted(SCRIPT_DIR.glob("*.csv"))
+    csv_files = find_csv_files(SCRIPT_DIR)
     
     if not csv_files:
         print("❌ No CSV files found in directory")
@@ -0,0 +1,60 @@
+import os
+import json
+import hashlib
+
+# Incremental builds: each stage (sampling in 00, cleaning in 05) remembers the
+# key it built every raw file with, and skips files whose key hasn't changed.
+# A key is the raw file's fingerprint plus everything else the stage output
+# depends on (its config entries and output settings).
+
+# --- CONFIGURATION ---
+FINGERPRINT_BYTES = 1024 * 1024  # Bytes hashed from each end of a raw file
+BUILD_VERSION = 2  # Bump to invalidate every cached result (e.g. after changing how files are cleaned)
+
+def file_fingerprint(path):
+    """Size + mtime + blake2b of the first and last FINGERPRINT_BYTES (cheap even for 10GB files)"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, stat.st_size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{digest.hexdigest()}"
+
+def build_key(path, *settings):
+    """Fingerprint of the raw file plus a hash of the settings (JSON-serializable) the output depends on"""
+    settings_json = json.dumps([BUILD_VERSION, *settings], sort_keys=True, default=str)
+    settings_hash = hashlib.blake2b(settings_json.encode(), digest_size=16).hexdigest()
+    return f"{file_fingerprint(path)}-{settings_hash}"
+
+class BuildCache:
+    """One stage's {raw file name: (key, result)} records, stored in a JSON file shared by all stages"""
+    def __init__(self, cache_path, stage):
+        self.cache_path = cache_path
+        self.stage = stage
+        self.entries = self._read().get(stage, {})
+
+    def _read(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def lookup(self, name, key):
+        """Result recorded for the file if it was built with the same key, else None"""
+        entry = self.entries.get(name)
+        return entry['result'] if entry and entry['key'] == key else None
+
+    def record(self, name, key, result):
+        self.entries[name] = {'key': key, 'result': result}
+
+    def save(self):
+        """Write this stage's records, keeping the other stages' (atomic replace)"""
+        data = self._read()
+        data[self.stage] = self.entries
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
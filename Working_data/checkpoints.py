@@ -0,0 +1,53 @@
+import os
+import json
+
+# Checkpoint journal for 05_Apply_Cleaning: after a chunk is durably written,
+# the journal records how far the input and output got plus everything needed
+# to carry on from there (whole-file stats, counters, open interpolation gaps).
+# The output is fsynced before the journal is replaced, so the journal never
+# points past data that is on disk.
+
+# --- CONFIGURATION ---
+CHECKPOINT_SUFFIX = ".checkpoint.json"  # Journal saved next to each output file
+
+def checkpoint_path(output_path):
+    return output_path.with_name(output_path.name + CHECKPOINT_SUFFIX)
+
+class CheckpointJournal:
+    def __init__(self, path, plan_key, global_stats, data_start):
+        self.path = path
+        self.plan_key = plan_key
+        self.global_stats = global_stats
+        self.data_start = data_start  # Byte offset of the first data record
+
+    def commit(self, output, bytes_done, state):
+        """
+        Record a checkpoint once every row read so far is in the output.
+        bytes_done: data bytes consumed; state: writer counters to restore on resume
+        """
+        entry = {
+            'plan_key': self.plan_key,
+            'global_stats': self.global_stats,
+            'input_offset': self.data_start + bytes_done,
+            'output_offset': output.sync(),
+            **state
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """The file finished: nothing to resume"""
+        self.path.unlink(missing_ok=True)
+
+def load_checkpoint(path, plan_key):
+    """Return the last checkpoint if it was written for the same raw file and config, else None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return entry if entry.get('plan_key') == plan_key else None
@@ -0,0 +1,66 @@
+# Adaptive chunk sizing for 05_Apply_Cleaning: rows per chunk are picked so the
+# chunks in flight fit a memory budget, starting from an estimate of in-memory
+# bytes per row and corrected from the RSS of the processes cleaning them. RSS
+# is read from /proc (Linux); elsewhere the estimate is kept. The budget is a
+# target, not a cap: the main process's queued results aren't measured.
+
+# --- CONFIGURATION ---
+MIN_CHUNK_ROWS = 1000
+MAX_CHUNK_ROWS = 1_000_000
+RESIZE_THRESHOLD = 0.25  # Ignore size changes under 25% (avoids resizing on noise)
+WORKING_COPIES = 3  # Raw bytes + parsed frame held ~3x while cleaning (cleaned values, encoded output)
+
+def estimate_row_bytes(raw_bytes, frame_bytes, rows):
+    """In-memory bytes per row while a chunk is cleaned, from a parsed sample of rows"""
+    if rows == 0:
+        return 0
+    return (raw_bytes + frame_bytes) / rows * WORKING_COPIES
+
+class ChunkSizer:
+    """
+    Rows per chunk, for iter_record_chunks (called before each chunk).
+    budget_mb is shared by chunks_in_flight chunks. Each cleaning process is measured
+    against its own baseline: its RSS before it cleaned its first chunk.
+    """
+    def __init__(self, budget_mb, chunks_in_flight, row_bytes):
+        self.chunk_budget_mb = budget_mb / chunks_in_flight
+        self.rows = self._clamp(self.chunk_budget_mb * 1024 * 1024 / row_bytes if row_bytes else MAX_CHUNK_ROWS)
+        self.sizes = [self.rows]  # Every size used, in order (logged in the summary)
+        self.baselines = {}  # pid -> RSS before its first chunk
+        self.peaks = {}  # pid -> largest chunk footprint seen (RSS over baseline)
+
+    def __call__(self):
+        return self.rows
+
+    @staticmethod
+    def _clamp(rows):
+        return int(min(max(rows, MIN_CHUNK_ROWS), MAX_CHUNK_ROWS))
+
+    def observe(self, rows, pid, rss_start_mb, rss_mb):
+        """
+        Check the memory a chunk of `rows` rows took in the process that cleaned it
+        (rss_start_mb / rss_mb: its RSS before and after the chunk).
+        Shrinks chunks when the footprint passes the per-chunk budget, grows them while it stays under half.
+        Returns: (new size, footprint MB) if the size changed, else None
+        """
+        if rss_mb is None or rss_start_mb is None or rows == 0:
+            return None
+        footprint = rss_mb - self.baselines.setdefault(pid, rss_start_mb)
+        # RSS keeps its high-water mark, so only a clear new high counts as this chunk's doing
+        new_high = footprint - self.peaks.get(pid, 0) > self.chunk_budget_mb * RESIZE_THRESHOLD
+        self.peaks[pid] = max(footprint, self.peaks.get(pid, 0))
+
+        if footprint > self.chunk_budget_mb and new_high:
+            target = self._clamp(rows * self.chunk_budget_mb / footprint)
+            if target >= self.rows:
+                return None
+        elif footprint < self.chunk_budget_mb / 2 and rows >= self.rows:
+            target = self._clamp(self.rows * 1.5)
+        else:
+            return None
+
+        if abs(target - self.rows) <= self.rows * RESIZE_THRESHOLD:
+            return None
+        self.rows = target
+        self.sizes.append(target)
+        return target, footprint
@@ -0,0 +1,338 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from date_sniffer import parse_dates
+
+# Cleaning actions shared by the preview (03_Data_Cleaning_Config) and the apply
+# script (05_Apply_Cleaning), so the preview is an exact prediction of the output.
+#
+# A column is cleaned as a value array plus a keep-mask of rows still alive.
+# Actions edit the array in place and clear keep for removed rows. Each step
+# only looks at alive rows, in config order:
+# parsing errors -> outliers -> negatives (numeric only) -> missing.
+# Date rows marked 'interpolate' are filled in one pass after the other steps.
+
+STAT_KEYS = ['rows_removed', 'values_filled', 'values_capped', 'values_converted',
+             'parsing_errors', 'outliers', 'negatives', 'missing']
+
+# --- PARSING ---
+def parse_numeric(values):
+    """
+    Strip currency symbols, commas, whitespace; "(5)" -> -5. Unparseable values become NaN.
+    values: pandas Series or pyarrow array. Returns: float64 numpy array
+    """
+    if isinstance(values, pd.Series) and pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+
+    if isinstance(values, pd.Series):
+        try:
+            values = pa.array(values, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed object column (e.g. ints and text in a sample)
+            values = pa.array(values.astype(str).where(values.notna()), type=pa.string(), from_pandas=True)
+    elif isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    cleaned = pc.replace_substring(pc.replace_substring_regex(values, r'[$,\s)]', ''), '(', '-')
+    numeric = pd.to_numeric(pd.Series(pd.arrays.ArrowStringArray(cleaned)), errors='coerce')
+    return numeric.to_numpy(dtype=float, na_value=np.nan)
+
+def as_int_values(values):
+    """
+    Int columns are cleaned as float64 (NaN for missing, fractional mean/median fills).
+    Round back to nullable Int64 so output has 1, 2 rather than 1.0, 2.0 (blank when missing).
+    Rounding is half to even (numpy's rule): a 2.5 fill is written as 2, a 3.5 fill as 4.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.isfinite(values)
+    return pd.arrays.IntegerArray(np.where(valid, np.round(values), 0).astype(np.int64), ~valid)
+
+def column_stats(values, actions=None):
+    """
+    Exact count/mean/std/median of a float array (same keys as the apply script's frozen stats).
+    With the column's actions, also the exact mean/median fills (see fill_basis).
+    """
+    valid = values[~np.isnan(values)]
+    stats = {
+        'count': len(valid),
+        'mean': valid.mean() if len(valid) > 0 else np.nan,
+        'std': valid.std(ddof=1) if len(valid) > 1 else np.nan,
+        'median': float(np.median(valid)) if len(valid) > 0 else np.nan
+    }
+    if actions is not None:
+        stats.update(fill_stats(fill_basis(valid, actions, stats)))
+    return stats
+
+# --- FILL STATISTICS ---
+# Mean/median fills come from the values that survive the column's outlier and
+# negative rules, not from every parsed value: a column whose outliers are removed
+# or capped shouldn't fill its gaps with a mean the outliers pulled up.
+FILL_ACTIONS = ['mean', 'median']
+
+def uses_fill_stats(actions):
+    return any(actions.get(issue) in FILL_ACTIONS for issue in ['parsing_errors', 'outliers', 'negatives', 'missing'])
+
+def outlier_bounds(col_stats, actions):
+    """(low, high) at outlier_threshold std around the raw mean, or None when the column has no spread"""
+    std = col_stats['std']
+    if not std > 0:
+        return None
+    threshold = actions.get('outlier_threshold', 3.0)
+    return (col_stats['mean'] - threshold * std, col_stats['mean'] + threshold * std)
+
+def fill_basis(values, actions, col_stats):
+    """
+    The values fills are computed from: valid parsed values after the outlier and negative
+    rules, as clean_numeric applies them. Removed or filled values drop out; capped and
+    absolute values count as converted.
+    col_stats: raw 'mean'/'std' (for the outlier bounds). Returns: float array
+    """
+    values = values[~np.isnan(values)]
+    bounds = outlier_bounds(col_stats, actions)
+    if bounds is not None:
+        outliers = (values < bounds[0]) | (values > bounds[1])
+        values = _surviving(values, outliers, actions.get('outliers', 'keep'), bounds)
+    return _surviving(values, values < 0, actions.get('negatives', 'keep'))
+
+def _surviving(values, mask, action, bounds=None):
+    if action == 'cap':
+        return np.clip(values, bounds[0], bounds[1])
+    if action == 'absolute':
+        return np.abs(values)
+    if action in ACTIONS:
+        return values[~mask]  # Removed, or replaced by the fill being computed
+    return values
+
+def fill_stats(basis):
+    """Exact mean/median fills of a fill_basis array"""
+    return {
+        'fill_mean': basis.mean() if len(basis) > 0 else np.nan,
+        'fill_median': float(np.median(basis)) if len(basis) > 0 else np.nan
+    }
+
+# --- ACTIONS ---
+# Each action edits values/keep in place for the rows in mask (alive rows only)
+# and returns (stat key, rows affected)
+def remove_rows(values, mask, keep, fill=None):
+    keep[mask] = False
+    return 'rows_removed', int(mask.sum())
+
+def fill_value(values, mask, keep, fill):
+    values[mask] = fill
+    return 'values_filled', int((mask & ~_isnan(values)).sum())
+
+def interpolate(values, mask, keep, seams=None):
+    """
+    Linear interpolation between alive rows, written only to the masked rows.
+    Without seams (a whole column), rows after the last valid value take that value, like pandas.
+    With a seams dict (one chunk of a file), only gaps inside the chunk are filled; the empty
+    rows before its first / after its last valid value are recorded for SeamStitcher.
+    """
+    alive = np.flatnonzero(keep)
+    target = mask[alive]
+    series = pd.Series(values[alive])
+    series[target] = np.datetime64('NaT') if values.dtype.kind == 'M' else np.nan
+    limit_area = 'inside' if seams is not None else None
+    values[alive[target]] = series.interpolate(method='linear', limit_area=limit_area).to_numpy()[target]
+    
+    if seams is not None:
+        blanked = series.to_numpy()
+        anchors = np.flatnonzero(~_isnan(blanked))
+        head_end = anchors[0] if len(anchors) else len(alive)
+        tail_start = anchors[-1] + 1 if len(anchors) else len(alive)
+        seams.update({
+            'first': blanked[anchors[0]] if len(anchors) else None,
+            'last': blanked[anchors[-1]] if len(anchors) else None,
+            'head_rows': alive[:head_end], 'head_target': target[:head_end],
+            'tail_rows': alive[tail_start:], 'tail_target': target[tail_start:],
+        })
+    return 'values_filled', int((mask & ~_isnan(values)).sum())
+
+def cap(values, mask, keep, bounds):
+    np.clip(values, bounds[0], bounds[1], out=values)
+    return 'values_capped', int(mask.sum())
+
+def absolute(values, mask, keep, fill=None):
+    np.abs(values, out=values)
+    return 'values_converted', int(mask.sum())
+
+def _isnan(values):
+    return np.isnat(values) if values.dtype.kind == 'M' else np.isnan(values)
+
+# What each configured action does, and which frozen stat it fills with
+ACTIONS = {
+    'remove': (remove_rows, None),
+    'mean': (fill_value, 'fill_mean'),
+    'median': (fill_value, 'fill_median'),
+    'interpolate': (interpolate, None),
+    'cap': (cap, 'bounds'),
+    'absolute': (absolute, None),
+}
+
+def run_action(action, values, mask, keep, col_stats, stats):
+    """Apply one configured action ('keep'/'strip' leave values as parsed)"""
+    if action not in ACTIONS or not mask.any():
+        return
+    func, fill_key = ACTIONS[action]
+    fill = col_stats.get(fill_key) if fill_key else None
+    key, count = func(values, mask, keep, fill)
+    stats[key] += count
+
+# --- COLUMN CLEANING ---
+def clean_numeric(raw, actions, col_stats, keep, stats):
+    values = parse_numeric(raw)
+    is_null = raw.isna().to_numpy()
+    parse_errors = np.isnan(values) & ~is_null & keep
+    stats['parsing_errors'] += int(parse_errors.sum())
+    stats['missing'] += int((is_null & keep).sum())
+
+    # Parse errors fill from stats of valid values only
+    run_action(actions.get('parsing_errors', 'keep'), values, parse_errors, keep, col_stats, stats)
+
+    if keep.any():
+        # Outliers (bounds from the frozen stats)
+        bounds = outlier_bounds(col_stats, actions)
+        if bounds is not None:
+            outliers = ((values < bounds[0]) | (values > bounds[1])) & keep
+            stats['outliers'] += int(outliers.sum())
+            run_action(actions.get('outliers', 'keep'), values, outliers, keep, {**col_stats, 'bounds': bounds}, stats)
+
+        # Negatives
+        negatives = (values < 0) & keep
+        stats['negatives'] += int(negatives.sum())
+        run_action(actions.get('negatives', 'keep'), values, negatives, keep, col_stats, stats)
+
+    # Missing: anything still without a value
+    run_action(actions.get('missing', 'keep'), values, np.isnan(values) & keep, keep, col_stats, stats)
+    return values
+
+def mark_for_interpolation(action, values, mask, keep, stats):
+    """Date issue step: 'interpolate' blanks the rows and returns them for the final fill; other actions run now"""
+    if action != 'interpolate':
+        run_action(action, values, mask, keep, {}, stats)
+        return np.zeros_like(mask)
+    values[mask] = np.datetime64('NaT')
+    return mask
+
+def clean_date(raw, actions, col_stats, keep, stats):
+    """
+    Rows to interpolate are blanked by each step and filled together at the end,
+    so parse errors and out-of-range dates are never used as anchors.
+    col_stats: {'seams': {}} when cleaning one chunk of a file (see interpolate)
+    """
+    parsed = parse_dates(raw, actions.get('date_format'))
+    if getattr(parsed.dt, 'tz', None) is not None:
+        parsed = parsed.dt.tz_convert(None)  # Offsets are compared and written as UTC
+    values = parsed.to_numpy(dtype='datetime64[ns]').copy()
+    is_null = raw.isna().to_numpy()
+    parse_errors = np.isnat(values) & ~is_null & keep
+    stats['parsing_errors'] += int(parse_errors.sum())
+    stats['missing'] += int((is_null & keep).sum())
+    
+    to_fill = mark_for_interpolation(actions.get('parsing_errors', 'keep'), values, parse_errors, keep, stats)
+
+    # Outliers (date range)
+    if actions.get('min_date') and actions.get('max_date'):
+        min_dt = np.datetime64(pd.Timestamp(actions['min_date']), 'ns')
+        max_dt = np.datetime64(pd.Timestamp(actions['max_date']), 'ns')
+        outliers = ((values < min_dt) | (values > max_dt)) & keep
+        stats['outliers'] += int(outliers.sum())
+        to_fill |= mark_for_interpolation(actions.get('outliers', 'keep'), values, outliers, keep, stats)
+
+    # Missing: anything still without a value (and not waiting to be interpolated)
+    missing = np.isnat(values) & keep & ~to_fill
+    to_fill |= mark_for_interpolation(actions.get('missing', 'keep'), values, missing, keep, stats)
+    
+    seams = (col_stats or {}).get('seams')
+    if to_fill.any() or seams is not None:
+        key, count = interpolate(values, to_fill & keep, keep, seams)
+        stats[key] += count
+    return values
+
+# Cleaner per category; all share one signature (date ignores col_stats)
+CLEANERS = {'int': clean_numeric, 'float': clean_numeric, 'date': clean_date}
+
+def clean_column(raw, category, actions, col_stats=None, keep=None):
+    """
+    Clean one column.
+    raw: values as read (pandas Series of text, or already-typed values in a sample)
+    col_stats: frozen {'count', 'mean', 'std', 'median'} for numeric columns, plus
+               'fill_mean'/'fill_median' when an action fills
+    keep: rows still alive (updated in place); defaults to all rows
+    Returns: (values, keep, stats) -- values is float64 or datetime64[ns], aligned with raw
+    """
+    if keep is None:
+        keep = np.ones(len(raw), dtype=bool)
+    stats = dict.fromkeys(STAT_KEYS, 0)
+
+    values = CLEANERS.get(category, clean_numeric)(raw, actions, col_stats, keep, stats)
+    return values, keep, stats
+
+# --- STREAMING INTERPOLATION ---
+class SeamStitcher:
+    """
+    Finishes one date column's interpolation across chunk boundaries.
+    Each chunk fills its inside gaps and reports (interpolate with seams) the rows
+    before its first / after its last valid date. Those rows wait here until the
+    next valid date arrives, then get the values a whole-file interpolation would
+    give; rows after the file's last valid date take that date. Only the open gap
+    is held, so memory is bounded by the longest gap, not the file.
+    """
+    def __init__(self, column):
+        self.column = column
+        self.last = None  # Last valid date so far (None: still before the first one)
+        self.gap = 0  # Alive rows in the open gap, including rows removed later
+        self.pending = []  # (frame, positions, gap_index) of surviving rows to fill
+        self.targets = 0  # Rows in the open gap marked for interpolation
+
+    def add(self, seam):
+        """
+        Feed one chunk's seam, with head/tail rows given as
+        'head': (gap_rows, target_count, frame, positions, gap_index) and likewise 'tail'.
+        Returns: values filled
+        """
+        self._extend(seam['head'])
+        if seam['first'] is None:
+            return 0
+        filled = self._close(seam['first'])
+        self.last = seam['last']
+        self._extend(seam['tail'])
+        return filled
+
+    def finish(self):
+        """End of file: rows after the last valid date take it. Returns: values filled"""
+        return self._close(None)
+
+    def state(self):
+        """Open-gap state for a checkpoint (taken when no rows are pending)"""
+        last = None if self.last is None else int(np.datetime64(self.last, 'ns').astype('int64'))
+        return {'last': last, 'gap': self.gap, 'targets': self.targets}
+
+    def restore(self, state):
+        self.last = None if state['last'] is None else np.datetime64(state['last'], 'ns')
+        self.gap, self.targets = state['gap'], state['targets']
+
+    def holds(self, frame):
+        return any(pending_frame is frame for pending_frame, _, _ in self.pending)
+
+    def _extend(self, part):
+        gap_rows, target_count, frame, positions, gap_index = part
+        if len(positions):
+            self.pending.append((frame, positions, gap_index + self.gap))
+        self.gap += gap_rows
+        self.targets += target_count
+
+    def _close(self, next_date):
+        filled = 0
+        if self.last is not None and self.targets:
+            filled = self.targets
+            for frame, positions, gap_index in self.pending:
+                if next_date is None:
+                    fill = np.full(len(positions), self.last)
+                else:
+                    # Same arithmetic as pandas: float interpolation of int64 ns, truncated
+                    ends = np.array([self.last, next_date], dtype='datetime64[ns]').view('i8').astype(float)
+                    fill = np.interp(gap_index + 1, [0, self.gap + 1], ends).astype('int64').view('datetime64[ns]')
+                frame.iloc[positions, frame.columns.get_loc(self.column)] = fill
+        self.pending, self.gap, self.targets = [], 0, 0
+        return filled
@@ -0,0 +1,166 @@
+import os
+import json
+import pickle
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass, field
+from build_cache import file_fingerprint
+from cleaning_kernel import STAT_KEYS, CLEANERS
+from raw_files import csv_name
+
+# A cleaning plan is everything 05_Apply_Cleaning needs to know about one raw file,
+# worked out once from 02_Data_Categories.json + 04_Data_Cleaning_actions.json:
+# resolved config keys, read dtypes and one kernel step per column to clean.
+# Chunks just run the steps, with no config lookups.
+
+# --- CONFIGURATION ---
+PLAN_CACHE_DIR = Path(__file__).parent / ".plan_cache"  # Compiled plans, one per raw file (Raw_Data stays untouched)
+PLAN_SUFFIX = ".plan.pkl"  # data.csv.gz -> .plan_cache/data.csv.gz.plan.pkl
+PLAN_VERSION = 4  # Bump when the plan layout changes so cached plans are rebuilt
+CLEAN_CATEGORIES = ['int', 'float', 'date']
+
+# --- CONFIG KEYS ---
+def resolve_config_key(config, csv_filename, preferred_key=None):
+    """
+    Find a file's entry in a config dict: exact name first, then preferred_key
+    (e.g. the matching categories key), then the name without a "sample_" prefix.
+    Returns: key or None
+    """
+    if csv_filename in config:
+        return csv_filename
+    if preferred_key in config:
+        return preferred_key
+    bare_name = csv_filename.replace("sample_", "")
+    for key in config:
+        if key.replace("sample_", "") == bare_name:
+            return key
+    return None
+
+# --- PLAN ---
+@dataclass
+class ColumnStep:
+    """One column to clean: kernel cleaner plus its configured actions"""
+    column: str
+    position: int  # Index in the parsed chunk (usecols order)
+    category: str
+    actions: dict
+    clean: object  # cleaning_kernel cleaner for the category
+    interpolates: bool = False  # Date column with an 'interpolate' action (gaps can span chunks)
+    col_stats: dict = None  # Frozen whole-file stats, bound after pass 1
+
+    def run(self, raw, keep):
+        """
+        Clean one chunk's values.
+        Returns: (values, stats, seams) -- seams is None unless the step interpolates
+        """
+        stats = dict.fromkeys(STAT_KEYS, 0)
+        seams = {} if self.interpolates else None
+        col_stats = {'seams': seams} if self.interpolates else self.col_stats
+        values = self.clean(raw, self.actions, col_stats, keep, stats)
+        return values, stats, seams
+
+@dataclass
+class CleaningPlan:
+    filename: str
+    categories_key: str
+    actions_key: str
+    key: str  # Hash of everything the plan was compiled from
+    columns: list  # Header, in file order
+    usecols: list  # Columns parsed (IGNORE columns are skipped)
+    dtypes: dict
+    cols_to_delete: list
+    cols_to_clean: dict
+    cols_to_copy: list
+    steps: list = field(default_factory=list)
+
+    @property
+    def read_options(self):
+        """pd.read_csv options for header-less, record-aligned data chunks"""
+        return {'header': None, 'names': self.columns, 'usecols': self.usecols, 'dtype': self.dtypes}
+
+    @property
+    def numeric_columns(self):
+        return [step.column for step in self.steps if step.category != 'date']
+
+    def bind_stats(self, global_stats):
+        """Attach pass 1 stats to each numeric step"""
+        for step in self.steps:
+            step.col_stats = global_stats.get(step.column)
+
+def plan_key(csv_path, columns, categories, cleaning_actions, string_dtype):
+    """
+    Changes when the raw file, its header or its config entries change.
+    Only looks up the file's config entries, so a cached plan can be found without compiling one.
+    """
+    csv_filename = csv_name(csv_path)
+    cat_key = resolve_config_key(categories, csv_filename)
+    action_key = resolve_config_key(cleaning_actions, csv_filename, cat_key)
+    source = [PLAN_VERSION, Path(csv_path).name, file_fingerprint(csv_path), columns,
+              categories.get(cat_key), cleaning_actions.get(action_key), string_dtype]
+    return hashlib.blake2b(json.dumps(source, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+def compile_plan(csv_path, columns, categories, cleaning_actions, string_dtype, key=None):
+    """
+    Resolve a raw file's config entries into a CleaningPlan.
+    columns: header of the raw file. string_dtype: read dtype for string columns.
+    key: plan_key, if the caller already has it.
+    Returns: CleaningPlan, or None if the file has no categories
+    """
+    csv_filename = csv_name(csv_path)
+    cat_key = resolve_config_key(categories, csv_filename)
+    if cat_key is None:
+        return None
+    action_key = resolve_config_key(cleaning_actions, csv_filename, cat_key)
+    file_categories = categories[cat_key]
+    file_actions = cleaning_actions.get(action_key, {}) if action_key else {}
+
+    dtypes = {}
+    for col in columns:
+        cat = file_categories.get(col)
+        if cat == 'string':
+            dtypes[col] = string_dtype
+        elif cat in CLEAN_CATEGORIES:
+            dtypes[col] = str
+    usecols = [col for col in columns if file_categories.get(col) != 'IGNORE']
+    positions = {col: i for i, col in enumerate(usecols)}
+
+    cols_to_clean = {col: cat for col, cat in file_categories.items() if cat in CLEAN_CATEGORIES}
+    steps = [ColumnStep(col, positions[col], cat, dict(file_actions[col]), CLEANERS[cat],
+                        interpolates=cat == 'date' and 'interpolate' in file_actions[col].values())
+             for col, cat in cols_to_clean.items() if col in file_actions and col in positions]
+
+    return CleaningPlan(
+        filename=csv_filename,
+        categories_key=cat_key,
+        actions_key=action_key,
+        key=key or plan_key(csv_path, columns, categories, cleaning_actions, string_dtype),
+        columns=columns,
+        usecols=usecols,
+        dtypes=dtypes,
+        cols_to_delete=[col for col, cat in file_categories.items() if cat == 'IGNORE'],
+        cols_to_clean=cols_to_clean,
+        cols_to_copy=[col for col, cat in file_categories.items() if cat == 'string'],
+        steps=steps
+    )
+
+# --- PLAN CACHE ---
+def plan_path(csv_path):
+    return PLAN_CACHE_DIR / (Path(csv_path).name + PLAN_SUFFIX)
+
+def load_cached_plan(csv_path, key):
+    """Return the cached plan for a raw file if it was compiled from the same inputs"""
+    try:
+        with open(plan_path(csv_path), 'rb') as f:
+            plan = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return plan if isinstance(plan, CleaningPlan) and plan.key == key else None
+
+def save_plan(plan, csv_path):
+    """Write the plan cache atomically (a half-written pickle is never read back)"""
+    path = plan_path(csv_path)
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(plan, f)
+    os.replace(tmp_path, path)
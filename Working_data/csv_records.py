@@ -0,0 +1,88 @@
+import numpy as np
+
+# --- CONFIGURATION ---
+BLOCK_SIZE = 8 * 1024 * 1024  # Bytes read per scan step
+
+NEWLINE = ord('\n')
+QUOTE = ord('"')
+
+# --- RECORD BOUNDARY SCANNING ---
+def find_record_ends(block, inside=0):
+    """
+    Find record boundaries in a block of CSV bytes, skipping newlines inside quoted fields.
+    inside: quote state (0/1) at the start of the block
+    Returns: (positions just past each record-ending newline, quote state at block end)
+    """
+    arr = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(arr == NEWLINE)
+    is_quote = arr == QUOTE
+
+    if not is_quote.any():
+        # Fast path: no quotes, every newline ends a record (unless we're inside a quoted field)
+        ends = newlines + 1 if not inside else newlines[:0]
+        return ends, inside
+
+    # Quote parity after each byte (uint8 wraps at 256, which keeps parity)
+    parity = (np.cumsum(is_quote, dtype=np.uint8) + inside) & 1
+    ends = newlines[parity[newlines] == 0] + 1
+    return ends, int(parity[-1])
+
+def read_header(f):
+    """Read the header record from a binary file handle, leaving it positioned at the first data record"""
+    parts = []
+    inside = 0
+    start = f.tell()
+    while True:
+        block = f.read(64 * 1024)
+        if not block:
+            break
+        ends, new_inside = find_record_ends(block, inside)
+        if len(ends):
+            parts.append(block[:ends[0]])
+            break
+        parts.append(block)
+        inside = new_inside
+    header = b"".join(parts)
+    f.seek(start + len(header))
+    return header
+
+def iter_record_chunks(f, records_per_chunk):
+    """
+    Split a binary CSV stream into chunks of whole records without parsing them.
+    f must be positioned at the start of a record (e.g. after read_header).
+    records_per_chunk: int, or a callable asked for the size before each chunk (adaptive sizing)
+    Yields: (start_offset, chunk_bytes, record_count)
+    """
+    next_size = records_per_chunk if callable(records_per_chunk) else lambda: records_per_chunk
+    target = next_size()
+    chunk_start = f.tell()
+    parts = []
+    records = 0
+    inside = 0
+    while True:
+        block = f.read(BLOCK_SIZE)
+        if not block:
+            break
+        ends, inside = find_record_ends(block, inside)
+
+        pos = 0
+        i = 0
+        while len(ends) - i >= target - records:
+            i += target - records
+            cut = int(ends[i - 1])
+            parts.append(block[pos:cut])
+            data = b"".join(parts)
+            yield chunk_start, data, target
+            chunk_start += len(data)
+            parts = []
+            records = 0
+            pos = cut
+            target = next_size()
+
+        parts.append(block[pos:])
+        records += len(ends) - i
+
+    # Trailing records (last one may lack a newline)
+    data = b"".join(parts)
+    if data.strip():
+        yield chunk_start, data, records + (0 if data.endswith(b"\n") else 1)
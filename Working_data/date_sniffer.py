@@ -0,0 +1,123 @@
+import re
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# --- CONFIGURATION ---
+SNIFF_SAMPLE_SIZE = 500  # Non-empty values tested against each format
+SNIFF_MIN_MATCH = 0.5  # Share of the sample a format must parse to be picked
+SNIFF_PROBE_SIZE = 20  # Values a format is tried on before the whole sample
+
+# Candidate formats, most common first. Ties go to the earlier one, so
+# month-first beats day-first (same as dateutil's default).
+DATE_PARTS = [
+    '%m/%d/%Y', '%d/%m/%Y', '%m/%d/%y', '%d/%m/%y', '%Y/%m/%d',
+    '%d.%m.%Y', '%d-%m-%Y', '%m-%d-%Y',
+    '%d-%b-%Y', '%d %b %Y', '%b %d, %Y', '%b %d %Y', '%d %B %Y', '%B %d, %Y',
+]
+TIME_PARTS = ['', ' %H:%M', ' %H:%M:%S', ' %I:%M %p', ' %I:%M:%S %p']
+DATE_FORMATS = ['ISO8601', '%Y%m%d'] + [date + time for date in DATE_PARTS for time in TIME_PARTS]
+
+# Cheap shape check per format (digit groups, separators, month names), so
+# pd.to_datetime only runs for formats the values could possibly match
+DIRECTIVE_SHAPES = {
+    '%Y': r'\d{4}', '%y': r'\d{2}', '%m': r'\d{1,2}', '%d': r'\d{1,2}',
+    '%H': r'\d{1,2}', '%I': r'\d{1,2}', '%M': r'\d{1,2}', '%S': r'\d{1,2}',
+    '%b': r'[A-Za-z]{3}', '%B': r'[A-Za-z]{3,9}', '%p': r'[AaPp][Mm]'
+}
+ISO8601_SHAPE = r'\d{4}([-/]?\d{1,2}([-/]?\d{1,2}([T ]\d{1,2}(:\d{1,2}(:\d{1,2}(\.\d+)?)?)?)?)?)?(Z|[+-]\d{2}:?\d{2})?'
+
+def _format_shape(fmt):
+    """Regex a value must fully match to have a chance of parsing with fmt"""
+    if fmt == 'ISO8601':
+        return re.compile(ISO8601_SHAPE)
+    parts = re.split(r'(%[A-Za-z])', fmt)
+    return re.compile("".join(DIRECTIVE_SHAPES.get(part) or re.escape(part) for part in parts))
+
+FORMAT_SHAPES = {fmt: _format_shape(fmt) for fmt in DATE_FORMATS}
+
+def _as_text(series):
+    """Dates read as numbers (e.g. 20230115) must be parsed as text, not as epoch offsets"""
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        return series
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        series = series.astype('Int64')  # Whole numbers with NaNs read as float
+    return series.astype('string')
+
+def sniff_date_format(series):
+    """
+    Pick the format that parses most of an evenly spaced subsample of the column.
+    Returns: strptime format (or 'ISO8601'), or None if no candidate reaches SNIFF_MIN_MATCH
+    """
+    values = series.dropna()
+    if len(values) > SNIFF_SAMPLE_SIZE:
+        step = len(values) / SNIFF_SAMPLE_SIZE
+        values = values.iloc[[int(i * step) for i in range(SNIFF_SAMPLE_SIZE)]]
+    values = _as_text(values).astype(str)
+    values = values[values.str.strip().str.len() > 0]
+    if len(values) == 0:
+        return None
+
+    # Formats must look right on, then parse, a small probe before the whole sample is parsed
+    step = max(len(values) / SNIFF_PROBE_SIZE, 1)
+    probe = values.iloc[[int(i * step) for i in range(min(SNIFF_PROBE_SIZE, len(values)))]]
+    probe_needed = len(probe) * SNIFF_MIN_MATCH / 2  # Lenient: the probe is only a few values
+    shape_hits = {}
+    
+    best_format, best_hits, best_probe_hits = None, 0, 0
+    for fmt in DATE_FORMATS:
+        shape = FORMAT_SHAPES[fmt]
+        if shape.pattern not in shape_hits:
+            shape_hits[shape.pattern] = sum(1 for value in probe if shape.fullmatch(value))
+        if shape_hits[shape.pattern] < probe_needed:
+            continue
+        probe_hits = pd.to_datetime(probe, format=fmt, errors='coerce').notna().sum()
+        if probe_hits < probe_needed or probe_hits < best_probe_hits:
+            continue
+        hits = pd.to_datetime(values, format=fmt, errors='coerce').notna().sum()
+        if hits > best_hits:
+            best_format, best_hits, best_probe_hits = fmt, hits, probe_hits
+            if hits == len(values):
+                break
+
+    return best_format if best_hits / len(values) >= SNIFF_MIN_MATCH else None
+
+def _strptime_fast(text, date_format):
+    """
+    pd.to_datetime(text, format=date_format, errors='coerce'), with most values parsed by Arrow.
+    Arrow is lenient where pandas isn't: it takes loose widths and whitespace, and an impossible
+    day like Feb 30 rolls into the next month (landing on day 1-3). So Arrow's result is only kept
+    for values that match the format's shape and either fall on day 4 or later or can't hold a
+    day 29-31; everything else goes to pandas.
+    Arrow's %B also takes abbreviations, so formats with full month names always go to pandas.
+    """
+    try:
+        arr = pa.array(text, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pd.to_datetime(text, format=date_format, errors='coerce')
+    parsed = pc.strptime(arr, format=date_format, unit='s', error_is_null=True)
+    year = pc.year(parsed)
+    trusted = pc.and_(pc.and_(pc.greater_equal(year, 1678), pc.less_equal(year, 2261)),  # pandas' datetime range
+                      pc.and_(pc.match_substring_regex(arr, f"^(?:{FORMAT_SHAPES[date_format].pattern})$"),
+                              pc.or_(pc.greater(pc.day(parsed), 3), pc.invert(pc.match_substring_regex(arr, '29|30|31')))))
+    trusted = pc.fill_null(trusted, False).to_numpy(zero_copy_only=False)
+    
+    values = np.full(len(text), np.datetime64('NaT'), dtype='datetime64[ns]')
+    values[trusted] = parsed.filter(trusted).to_numpy(zero_copy_only=False).astype('datetime64[ns]')
+    rest = ~trusted & text.notna().to_numpy()
+    if rest.any():
+        values[rest] = pd.to_datetime(text[rest], format=date_format, errors='coerce').to_numpy()
+    return pd.Series(values, index=text.index, name=text.name)
+
+def parse_dates(series, date_format=None):
+    """
+    Parse a column with a known format in one vectorized pass.
+    Values that don't match the format become NaT (parsing errors).
+    Without a format, falls back to pandas' own inference.
+    """
+    if date_format is None:
+        return pd.to_datetime(series, errors='coerce')
+    if date_format in FORMAT_SHAPES and date_format != 'ISO8601' and '%B' not in date_format:
+        return _strptime_fast(_as_text(series), date_format)
+    return pd.to_datetime(_as_text(series), format=date_format, errors='coerce')
@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+
+try:
+    import resource  # Unix only; peak memory is not reported elsewhere
+except ImportError:
+    resource = None
+
+# Phase timing for 05_Apply_Cleaning: wall and CPU seconds per phase, plus
+# optional Chrome trace events (open the JSON in chrome://tracing or Perfetto).
+# Trace timestamps come from time.perf_counter, which is system-wide on Linux,
+# so events from worker processes line up on one timeline.
+
+def merge_phases(total, phases):
+    """Add {phase: {'wall', 'cpu'}} seconds into a running total"""
+    for name, seconds in phases.items():
+        entry = total.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+        entry['wall'] += seconds['wall']
+        entry['cpu'] += seconds['cpu']
+
+class PhaseTimer:
+    """Collects wall/CPU seconds per named phase (summed over repeats) and, if tracing, one event per run"""
+    def __init__(self, trace=False):
+        self.phases = {}
+        self.events = [] if trace else None
+
+    @contextlib.contextmanager
+    def phase(self, name, **args):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            merge_phases(self.phases, {name: {'wall': wall, 'cpu': time.process_time() - cpu_start}})
+            self.trace(name, wall_start, wall, **args)
+
+    def trace(self, name, start, seconds, **args):
+        """Record a trace event without adding to the phase totals (no-op unless tracing)"""
+        if self.events is None:
+            return
+        self.events.append({
+            'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': seconds * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args
+        })
+
+def peak_rss_mb():
+    """
+    Peak resident memory in MB of this process and of its finished worker processes.
+    Returns: {'self', 'children'}, or None without the resource module
+    """
+    if resource is None:
+        return None
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    }
+
+def current_rss_mb():
+    """Resident memory of this process in MB right now (Linux /proc), or None where unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def write_chrome_trace(events, trace_path):
+    """Write events in the Chrome trace format"""
+    with open(trace_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,158 @@
+import io
+import bz2
+import gzip
+import queue
+import threading
+from pathlib import Path
+
+try:
+    import zstandard  # Optional: only needed for .csv.zst files
+except ImportError:
+    zstandard = None
+
+# Raw CSVs may arrive compressed (.csv.gz / .csv.bz2 / .csv.zst). They are
+# streamed, never decompressed to disk: a background thread decompresses a few
+# blocks ahead of the reader, so decompression overlaps with parsing (zlib, bz2
+# and zstd release the GIL while they work).
+
+# --- CONFIGURATION ---
+COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd'}  # File suffix -> compression
+CSV_PATTERNS = ["*.csv"] + [f"*.csv{suffix}" for suffix in COMPRESSIONS]
+READ_BLOCK_SIZE = 4 * 1024 * 1024  # Decompressed bytes per block handed to the reader
+READ_AHEAD_BLOCKS = 4  # Blocks decompressed ahead of the reader
+
+def find_csv_files(folder):
+    """Plain and compressed CSVs in a folder, sorted by name"""
+    return sorted({path for pattern in CSV_PATTERNS for path in Path(folder).glob(pattern)})
+
+def name_collisions(csv_files):
+    """
+    Raw files that share a .csv name (e.g. data.csv and data.csv.gz) and would write the same outputs.
+    Returns: {csv name: [paths]} for names used more than once
+    """
+    by_name = {}
+    for path in csv_files:
+        by_name.setdefault(csv_name(path), []).append(path)
+    return {name: paths for name, paths in by_name.items() if len(paths) > 1}
+
+def compression_of(path):
+    """'gzip', 'bz2', 'zstd' or None"""
+    return COMPRESSIONS.get(Path(path).suffix.lower())
+
+def csv_name(path):
+    """File name without the compression suffix (data.csv.gz -> data.csv), used for config keys and outputs"""
+    path = Path(path)
+    return path.stem if compression_of(path) else path.name
+
+def compressed_suffix(compression):
+    """Suffix for a compression name (e.g. 'gzip' -> '.gz'), '' for None"""
+    return {name: suffix for suffix, name in COMPRESSIONS.items()}.get(compression, "")
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError("zstd files need the zstandard package (pip install zstandard)")
+
+def open_decompressed(path, compression):
+    """Binary stream of the decompressed data (decompresses in the calling thread)"""
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    if compression == 'zstd':
+        _require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+    raise ValueError(f"Unknown compression: {compression}")
+
+class ThreadedDecompressor(io.RawIOBase):
+    """
+    Raw stream fed by a background thread that decompresses READ_AHEAD_BLOCKS ahead.
+    Supports tell() and forward seeks (skipped by reading), which is what resuming needs.
+    """
+    def __init__(self, path, compression):
+        super().__init__()
+        self._blocks = queue.Queue(maxsize=READ_AHEAD_BLOCKS)
+        self._stop = threading.Event()
+        self._block = memoryview(b"")
+        self._pos = 0
+        self._eof = False
+        self._thread = threading.Thread(target=self._decompress, args=(path, compression), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _decompress(self, path, compression):
+        try:
+            with open_decompressed(path, compression) as f:
+                while not self._stop.is_set():
+                    block = f.read(READ_BLOCK_SIZE)
+                    self._put(block)
+                    if not block:
+                        return
+        except Exception as e:
+            self._put(e)  # Raised in the reader
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._block and not self._eof:
+            item = self._blocks.get()
+            if isinstance(item, Exception):
+                raise item
+            self._eof = not item
+            self._block = memoryview(item)
+        n = min(len(buffer), len(self._block))
+        buffer[:n] = self._block[:n]
+        self._block = self._block[n:]
+        self._pos += n
+        return n
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        target = offset if whence == io.SEEK_SET else self._pos + offset if whence == io.SEEK_CUR else None
+        if target is None or target < self._pos:
+            raise io.UnsupportedOperation("compressed input can only seek forward from the current position")
+        skip = bytearray(min(target - self._pos, READ_BLOCK_SIZE))
+        while self._pos < target:
+            if not self.readinto(memoryview(skip)[:target - self._pos]):
+                break
+        return self._pos
+
+    def close(self):
+        self._stop.set()
+        super().close()
+
+def open_raw(path):
+    """Binary stream of a raw CSV, decompressing in a background thread when the file is compressed"""
+    compression = compression_of(path)
+    if compression is None:
+        return open(path, 'rb')
+    return io.BufferedReader(ThreadedDecompressor(path, compression), buffer_size=READ_BLOCK_SIZE)
+
+def open_raw_text(path, **options):
+    """Text stream of a raw CSV (options go to io.TextIOWrapper, e.g. encoding, newline)"""
+    return io.TextIOWrapper(open_raw(path), **options)
+
+def open_output(path, compression, **options):
+    """Text stream writing to path, compressed with 'gzip', 'bz2', 'zstd' or None (options as for open())"""
+    if compression is None:
+        return open(path, 'w', **options)
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', **options)
+    if compression == 'bz2':
+        return bz2.open(path, 'wt', **options)
+    if compression == 'zstd':
+        _require_zstandard()
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True), **options)
+    raise ValueError(f"Unknown compression: {compression}")
@@ -0,0 +1,92 @@
+import sys
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+WORKING_DATA = Path(__file__).resolve().parent.parent / "Working_data"
+sys.path.insert(0, str(WORKING_DATA))
+
+import cleaning_plan
+
+ROWS = 600
+
+CATEGORIES = {'data.csv': {'qty': 'int', 'price': 'float', 'when': 'date', 'name': 'string'}}
+CLEANING_ACTIONS = {'data.csv': {
+    'qty': {'category': 'int', 'parsing_errors': 'keep', 'outliers': 'keep', 'negatives': 'keep', 'missing': 'mean'},
+    'price': {'category': 'float', 'parsing_errors': 'remove', 'outliers': 'cap', 'negatives': 'absolute',
+              'missing': 'median', 'outlier_threshold': 3.0},
+    'when': {'category': 'date', 'parsing_errors': 'interpolate', 'outliers': 'interpolate', 'missing': 'interpolate',
+             'min_date': '2020-01-01', 'max_date': '2030-01-01', 'date_format': '%Y-%m-%d %H:%M:%S'},
+}}
+
+class FixedSizer:
+    """Stands in for ChunkSizer: hands out the given chunk sizes in turn (cycling) and never resizes"""
+    def __init__(self, sizes):
+        self.plan = list(sizes)
+        self.rows = self.plan[0]
+        self.sizes = []
+        self.chunk_budget_mb = 0
+
+    def __call__(self):
+        self.rows = self.plan[len(self.sizes) % len(self.plan)]
+        self.sizes.append(self.rows)
+        return self.rows
+
+    def observe(self, rows, pid, rss_start_mb, rss_mb):
+        return None
+
+def write_raw_csv(path):
+    """
+    Midnight dates with a few timed ones, gaps long enough to span several chunks,
+    parse errors, negatives, outliers and blanks: everything that could depend on chunk boundaries.
+    """
+    rng = np.random.default_rng(7)
+    when = pd.date_range('2020-01-01', periods=ROWS, freq='D').strftime('%Y-%m-%d %H:%M:%S').to_numpy().astype(object)
+    when[::97] = [f"{day[:10]} 06:30:00" for day in when[::97]]
+    for start, end in [(0, 5), (40, 95), (300, 302), (590, ROWS)]:
+        when[start:end] = ''
+    when[rng.choice(ROWS, 20, replace=False)] = 'not a date'
+    qty = rng.integers(-5, 50, ROWS).astype(object)
+    qty[rng.choice(ROWS, 40, replace=False)] = ''
+    price = np.round(rng.normal(100, 15, ROWS), 2).astype(object)
+    price[rng.choice(ROWS, 10, replace=False)] = 5000
+    price[rng.choice(ROWS, 30, replace=False)] = ''
+    price[rng.choice(ROWS, 10, replace=False)] = 'n/a'
+    frame = pd.DataFrame({'qty': qty, 'price': price, 'when': when, 'name': [f"item {i}" for i in range(ROWS)]})
+    frame.to_csv(path, index=False)
+
+@pytest.fixture
+def apply(tmp_path, monkeypatch):
+    """05_Apply_Cleaning loaded as a module, writing its outputs and plan cache under tmp_path"""
+    spec = importlib.util.spec_from_file_location("apply_cleaning", WORKING_DATA / "05_Apply_Cleaning.py")
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "apply_cleaning", module)  # Worker processes unpickle clean_chunk from here
+    spec.loader.exec_module(module)
+    cleaned = tmp_path / "Cleaned_Data"
+    cleaned.mkdir()
+    monkeypatch.setattr(module, "CLEANED_DATA", cleaned)
+    monkeypatch.setattr(cleaning_plan, "PLAN_CACHE_DIR", tmp_path / "plan_cache")
+    return module
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "data.csv"
+    write_raw_csv(path)
+    return path
+
+@pytest.fixture
+def clean(apply, raw_csv, monkeypatch):
+    """
+    clean(sizes, chunk_workers=1, resume=False): run process_csv on raw_csv with chunks of the
+    given sizes (cycled) and return the output bytes.
+    """
+    def run(sizes, chunk_workers=1, resume=False):
+        sizer = FixedSizer(sizes)
+        monkeypatch.setattr(apply, "plan_chunk_sizes", lambda *args: sizer)
+        success, summary = apply.process_csv(raw_csv, CATEGORIES, CLEANING_ACTIONS, chunk_workers, resume=resume)
+        assert success
+        return (apply.CLEANED_DATA / summary['output_file']).read_bytes()
+    return run
@@ -0,0 +1,38 @@
+import io
+import importlib.util
+from pathlib import Path
+
+import pandas as pd
+
+WORKING_DATA = Path(__file__).resolve().parent.parent / "Working_data"
+
+SAMPLE = (
+    "qty,price,money,when,compact,code,flag\n"
+    "1,1.5,\"$1,000.00\",2024-01-05,20240105,A,x\n"
+    "2,2.0,(12),2024-01-06,20240106,B,x\n"
+    "3,3.25,$7.50,2024-01-07,20240107,C,x\n"
+    "4,4.0,\"$2,500.00\",2024-01-08,20240108,D,x\n"
+)
+
+def load_categorizer():
+    spec = importlib.util.spec_from_file_location("data_categorizer", WORKING_DATA / "01_Data_Categorizer.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_recommendations():
+    results = load_categorizer().analyze_frame(pd.read_csv(io.StringIO(SAMPLE)))
+    assert {col: result['recommended'] for col, result in results.items()} == {
+        'qty': 'int', 'price': 'float', 'money': 'float', 'when': 'date',
+        'compact': 'int', 'code': 'string', 'flag': 'IGNORE'
+    }
+    assert results['when']['date_format'] == 'ISO8601'
+    assert results['compact']['stats']['date'] == 1.0  # YYYYMMDD numbers count as dates too
+    assert results['money']['stats']['int'] == 0.75
+    assert results['flag']['dominance'] == 1.0
+
+def test_text_and_numeric_reads_agree():
+    categorizer = load_categorizer()
+    as_read = categorizer.analyze_frame(pd.read_csv(io.StringIO(SAMPLE)))
+    as_text = categorizer.analyze_frame(pd.read_csv(io.StringIO(SAMPLE), dtype=str))
+    assert as_read == as_text
@@ -0,0 +1,38 @@
+import json
+import importlib.util
+import threading
+from pathlib import Path
+
+WORKING_DATA = Path(__file__).resolve().parent.parent / "Working_data"
+
+def load_config_app(monkeypatch, cleaning_file):
+    spec = importlib.util.spec_from_file_location("data_cleaning_config", WORKING_DATA / "03_Data_Cleaning_Config.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "CLEANING_FILE", cleaning_file)
+    return module
+
+def test_save_keeps_other_files_plans(tmp_path, monkeypatch):
+    cleaning_file = tmp_path / "04_Data_Cleaning_actions.json"
+    config_app = load_config_app(monkeypatch, cleaning_file)
+    cleaning_file.write_text(json.dumps({'sample_a.csv': {'x': {'missing': 'mean'}}}))
+    
+    # Another session saved b.csv after this one loaded the config
+    config_app.save_file_actions('sample_b.csv', {'y': {'missing': 'remove'}})
+    config_app.save_file_actions('sample_a.csv', {'x': {'missing': 'median'}})
+    assert json.loads(cleaning_file.read_text()) == {
+        'sample_a.csv': {'x': {'missing': 'median'}},
+        'sample_b.csv': {'y': {'missing': 'remove'}},
+    }
+    assert sorted(path.name for path in tmp_path.iterdir()) == [cleaning_file.name]  # No lock or temp file left
+
+def test_concurrent_saves_all_land(tmp_path, monkeypatch):
+    cleaning_file = tmp_path / "04_Data_Cleaning_actions.json"
+    config_app = load_config_app(monkeypatch, cleaning_file)
+    saves = [threading.Thread(target=config_app.save_file_actions, args=(f"sample_{i}.csv", {'col': {'missing': 'mean'}}))
+             for i in range(8)]
+    for save in saves:
+        save.start()
+    for save in saves:
+        save.join()
+    assert sorted(json.loads(cleaning_file.read_text())) == [f"sample_{i}.csv" for i in range(8)]
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_kernel import parse_numeric, column_stats, clean_column
+
+# Mean/median fills must come from the values that survive the column's
+# outlier and negative rules, and 05 must fill with what the preview shows.
+
+ACTIONS = {'parsing_errors': 'median', 'outliers': 'remove', 'negatives': 'absolute', 'missing': 'median',
+           'outlier_threshold': 3.0}
+
+def raw_counts():
+    """Int counts mostly 1-8 with a few huge outliers, negatives, blanks and parse errors"""
+    rng = np.random.default_rng(3)
+    counts = rng.integers(1, 9, 2000).astype(object)
+    counts[rng.choice(2000, 15, replace=False)] = 90000
+    counts[rng.choice(2000, 40, replace=False)] = -3
+    counts[rng.choice(2000, 60, replace=False)] = None
+    counts[rng.choice(2000, 10, replace=False)] = 'many'
+    return pd.Series(counts).astype('string')
+
+def test_fills_ignore_removed_outliers():
+    raw = raw_counts()
+    stats = column_stats(parse_numeric(raw), {**ACTIONS, 'missing': 'mean'})
+    values = parse_numeric(raw)
+    survivors = np.abs(values[(values < 1000) & ~np.isnan(values)])
+    assert stats['fill_mean'] == pytest.approx(survivors.mean())
+    assert stats['fill_median'] == np.median(survivors)
+    assert stats['mean'] > 500  # Raw mean, pulled up by the outliers (still used for the bounds)
+
+def test_capped_values_count_as_capped():
+    values = np.array([1.0, 2.0, 3.0, 4.0] * 10 + [1000.0])
+    stats = column_stats(values, {'outliers': 'cap', 'missing': 'mean', 'outlier_threshold': 1.0})
+    assert stats['fill_mean'] == pytest.approx(np.clip(values, stats['mean'] - stats['std'], stats['mean'] + stats['std']).mean())
+
+def write_counts(tmp_path, raw):
+    csv_path = tmp_path / "counts.csv"
+    pd.DataFrame({'count': raw}).to_csv(csv_path, index=False)
+    return csv_path, {'counts.csv': {'count': 'int'}}, {'counts.csv': {'count': {'category': 'int', **ACTIONS}}}
+
+def test_apply_fills_like_preview(apply, tmp_path):
+    raw = raw_counts()
+    csv_path, categories, cleaning_actions = write_counts(tmp_path, raw)
+    success, summary = apply.process_csv(csv_path, categories, cleaning_actions)
+    assert success
+
+    output = pd.read_csv(apply.CLEANED_DATA / summary['output_file'])['count']
+    values, keep, _ = clean_column(raw, 'int', ACTIONS, column_stats(parse_numeric(raw), ACTIONS))
+    assert output.tolist() == np.round(values[keep]).tolist()
+
+def test_fill_stats_past_memory_budget(apply, tmp_path):
+    raw = raw_counts()
+    csv_path, categories, cleaning_actions = write_counts(tmp_path, raw)
+    plan = apply.get_cleaning_plan(csv_path, categories, cleaning_actions)
+    streamed = apply.compute_global_stats(csv_path, plan, memory_budget_mb=0)['count']
+    exact = column_stats(parse_numeric(raw), ACTIONS)
+    assert not streamed['fill_exact']
+    assert streamed['fill_mean'] == pytest.approx(exact['fill_mean'])
+    assert abs(streamed['fill_median'] - exact['fill_median']) <= 1  # t-digest estimate
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet"])
+def test_fractional_fill_in_int_column(apply, tmp_path, monkeypatch, output_format):
+    monkeypatch.setattr(apply, "OUTPUT_FORMAT", output_format)
+    csv_path = tmp_path / "counts.csv"
+    pd.DataFrame({'low': [1, 2, 3, 4, None], 'high': [3, 4, 3, 4, None]}).to_csv(csv_path, index=False)
+    fill_mean = {'category': 'int', 'missing': 'mean'}
+    success, summary = apply.process_csv(csv_path, {'counts.csv': {'low': 'int', 'high': 'int'}},
+                                         {'counts.csv': {'low': fill_mean, 'high': fill_mean}})
+    assert success
+
+    output_path = apply.CLEANED_DATA / summary['output_file']
+    output = pd.read_csv(output_path) if output_format == "csv" else pd.read_parquet(output_path)
+    # Fill means 2.5 and 3.5 round half to even
+    assert output['low'].tolist() == [1, 2, 3, 4, 2]
+    assert output['high'].tolist() == [3, 4, 3, 4, 4]
@@ -0,0 +1,44 @@
+import sys
+import importlib.util
+from pathlib import Path
+
+WORKING_DATA = Path(__file__).resolve().parent.parent / "Working_data"
+sys.path.insert(0, str(WORKING_DATA))
+
+from cleaning_plan import compile_plan
+from csv_records import read_header
+
+KEEP_ALL = {'parsing_errors': 'keep', 'outliers': 'keep', 'negatives': 'keep', 'missing': 'keep'}
+
+def load_apply_script():
+    spec = importlib.util.spec_from_file_location("apply_cleaning", WORKING_DATA / "05_Apply_Cleaning.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def clean_to_csv(tmp_path, text, qty_actions):
+    """Run one file through plan -> pass 1 -> clean_chunk and return the CSV text"""
+    apply = load_apply_script()
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text(text, encoding='utf-8')
+    categories = {'data.csv': {'qty': 'int', 'name': 'string'}}
+    actions = {'data.csv': {'qty': {'category': 'int', **qty_actions}}}
+    plan = compile_plan(csv_path, ['qty', 'name'], categories, actions, apply.STRING_DTYPE)
+    plan.bind_stats(apply.compute_global_stats(csv_path, plan))
+    with open(csv_path, 'rb') as f:
+        read_header(f)
+        data = f.read()
+    payload, *_ = apply.clean_chunk(data, plan, include_header=True)
+    return payload
+
+def test_int_column_keeps_integer_formatting(tmp_path):
+    output = clean_to_csv(tmp_path, "qty,name\n0,a\n1,b\n25,c\n", KEEP_ALL)
+    assert output.splitlines() == ["qty,name", "0,a", "1,b", "25,c"]
+
+def test_int_column_missing_stays_blank(tmp_path):
+    output = clean_to_csv(tmp_path, "qty,name\n3,a\n,b\n\"$1,000\",c\n", KEEP_ALL)
+    assert output.splitlines() == ["qty,name", "3,a", ",b", "1000,c"]
+
+def test_int_column_mean_fill_is_rounded(tmp_path):
+    output = clean_to_csv(tmp_path, "qty,name\n1,a\n2,b\n4,c\n,d\n", {**KEEP_ALL, 'missing': 'mean'})
+    assert output.splitlines() == ["qty,name", "1,a", "2,b", "4,c", "2,d"]
@@ -0,0 +1,41 @@
+import pytest
+
+# The cleaned CSV must not depend on how pass 2 splits or schedules the file:
+# every run below is compared byte for byte with a plain serial run.
+
+WHOLE_FILE = [1_000_000]
+
+@pytest.mark.parametrize("sizes", [[1], [7], [50], [199]])
+def test_chunk_size_does_not_change_output(clean, sizes):
+    assert clean(sizes) == clean(WHOLE_FILE)
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_worker_count_does_not_change_output(clean, workers):
+    assert clean([37], chunk_workers=workers) == clean([37], chunk_workers=1)
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("sizes", [[3, 120, 17, 1, 64], [250, 2, 2, 90], [450, 5]])
+def test_resizing_mid_file_does_not_change_output(clean, sizes, workers):
+    # The sizer changes its answer between chunks, as ChunkSizer does when it resizes
+    assert clean(sizes, chunk_workers=workers) == clean(WHOLE_FILE)
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_resumed_run_matches_clean_run(apply, clean, monkeypatch, workers):
+    write = apply.CsvOutput.write
+    calls = []
+    def interrupted_write(self, text):
+        calls.append(text)
+        if len(calls) == 40:
+            write(self, text[:len(text) // 2])  # Torn write past the last checkpoint
+            raise OSError("disk full")
+        write(self, text)
+    monkeypatch.setattr(apply.CsvOutput, "write", interrupted_write)
+    with pytest.raises(OSError):
+        clean([7], chunk_workers=workers)
+    monkeypatch.setattr(apply.CsvOutput, "write", write)
+    output_path = apply.CLEANED_DATA / "Cleaned_data.csv"
+    assert apply.checkpoint_path(output_path).exists()
+    
+    resumed = clean([11, 3], chunk_workers=workers, resume=True)
+    assert not apply.checkpoint_path(output_path).exists()
+    assert resumed == clean(WHOLE_FILE)